@@ -16,19 +16,30 @@ from kivy.uix.label import Label
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.relativelayout import RelativeLayout
 from kivy.uix.image import Image
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.core.window import Window
 from kivy.metrics import dp
 from kivy.config import Config
 from kivy.graphics import Color, RoundedRectangle, Rectangle
 from kivy.clock import Clock, mainthread
 from kivy.core.text import LabelBase, DEFAULT_FONT
-import webbrowser
+import logging
 import os
 import time
 import socket  # 新增加网络检查需要的模块
 from datetime import datetime
 import main  # 导入后端模块
 import ai_main  # 导入AI调用模块
+import huancun  # AI回复缓存模块
+import tishi  # AI提问文本模块
+import shuchu  # 输出目标模块
+import guagong  # 卦宫判断模块（64卦列表）
+import data  # 卦辞和爻辞存储模块
+import sousuo  # 卦辞爻辞检索模块
+
+# 逐块的界面与状态更新只记调试日志（默认不输出），避免每个数据块都写入移动端logcat
+logger = logging.getLogger("liuyao")
 
 # 字体设置
 try:
@@ -226,17 +237,24 @@ class HomeScreen(Screen):
         nav_layout.add_widget(divination_btn)
 
         query_btn = RoundedButton(text="查询", background_color=(0.3, 0.7, 0.5, 1))
-        query_btn.bind(on_press=self.open_baidu)
+        query_btn.bind(on_press=self.open_encyclopedia)
         nav_layout.add_widget(query_btn)
 
+        search_btn = RoundedButton(text="检索", background_color=(0.5, 0.5, 0.8, 1))
+        search_btn.bind(on_press=self.go_to_search)
+        nav_layout.add_widget(search_btn)
+
         layout.add_widget(nav_layout)
         self.add_widget(layout)
 
     def go_to_divination(self, instance):
         self.manager.current = 'reason'
 
-    def open_baidu(self, instance):
-        webbrowser.open('http://zy.kvov.com/index.php')  #64卦详解网站，对应主页的查询按键，可自行修改
+    def open_encyclopedia(self, instance):
+        self.manager.current = 'encyclopedia'  # 本地64卦列表，无需联网
+
+    def go_to_search(self, instance):
+        self.manager.current = 'search'
 
 
 # 输入起卦原因的屏幕
@@ -525,17 +543,18 @@ class ResultScreen(Screen):
 
     def calculate_result(self, dt):
         try:
-            result_text = main.arrange_hexagram(
+            # 结果直接显示在界面上，不再输出到终端（移动端logcat输出很慢）
+            result = main.arrange(
                 self.manager.hexagram,
                 self.manager.time,
-                self.manager.reason
+                self.manager.reason,
+                sink=shuchu.NULL_SINK
             )
 
-            self.manager.full_result = main.ai_text
-            self.result_label.text = result_text
+            self.manager.full_result = result.ai_text
+            self.manager.prompt_text = tishi.render_prompt(result.chart)  # 向AI提问用紧凑文本
+            self.result_label.text = result.text
             self.result_label.width = max(Window.width * 0.9, self.result_label.texture_size[0])
-            print(f"排盘结果: {result_text}")
-            print(f"AI分析文本: {self.manager.full_result}")
 
         except Exception as e:
             self.result_label.text = f"计算出错：{str(e)}"
@@ -546,12 +565,159 @@ class ResultScreen(Screen):
         self.manager.time = None
         self.manager.reason = ""
         self.manager.full_result = ""
+        self.manager.prompt_text = ""
         self.manager.current = 'home'
 
     def go_to_ai_analysis(self, instance):
         self.manager.current = 'ai_analysis'
 
 
+# 64卦列表项（RecycleView只创建可见数量的列表项，滚动时复用）
+class HexagramListItem(Button):
+    def __init__(self, **kwargs):
+        super(HexagramListItem, self).__init__(**kwargs)
+        self.background_normal = ''
+        self.background_color = (1, 1, 1, 0.85)
+        self.color = (0, 0, 0, 1)
+        self.font_size = dp(16)
+        self.halign = 'left'
+        self.valign = 'middle'
+        self.bind(size=self.update_text_size)
+
+    def update_text_size(self, instance, value):
+        self.text_size = (value[0] - dp(20), None)
+
+
+# 64卦查询屏幕（本地数据，替代原先打开外部网站）
+class EncyclopediaScreen(Screen):
+    def __init__(self, **kwargs):
+        super(EncyclopediaScreen, self).__init__(**kwargs)
+
+        layout = BackgroundLayout()
+
+        content_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        content_layout.add_widget(TitleLabel(text="64卦查询"))
+
+        self.list_view = RecycleView(size_hint=(1, 1), do_scroll_x=False)
+        list_layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(50)),
+            default_size_hint=(1, None),
+            size_hint_y=None,
+            spacing=dp(4)
+        )
+        list_layout.bind(minimum_height=list_layout.setter('height'))
+        self.list_view.add_widget(list_layout)
+        self.list_view.viewclass = HexagramListItem
+        # 按卦宫顺序列出64卦，卦辞爻辞在点开时才读取
+        self.list_view.data = [
+            {
+                'text': f"{info['卦名']}    {info['宫名']} · {info['卦类型']}",
+                'on_release': lambda name=info['卦名']: self.show_detail(name)
+            }
+            for info in guagong.HEXAGRAMS.values()
+        ]
+        content_layout.add_widget(self.list_view)
+
+        back_btn = RoundedButton(text="返回", background_color=(0.6, 0.6, 0.6, 1))
+        back_btn.bind(on_press=lambda x: setattr(self.manager, 'current', 'home'))
+        content_layout.add_widget(back_btn)
+
+        layout.add_widget(content_layout)
+        self.add_widget(layout)
+
+    def show_detail(self, name):
+        self.manager.encyclopedia_name = name
+        self.manager.current = 'hexagram_detail'
+
+
+# 单卦详情屏幕（卦辞、爻辞）
+class HexagramDetailScreen(Screen):
+    def __init__(self, **kwargs):
+        super(HexagramDetailScreen, self).__init__(**kwargs)
+
+        layout = BackgroundLayout()
+
+        content_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        self.title_label = TitleLabel(text="")
+        content_layout.add_widget(self.title_label)
+
+        self.scroll_view = ScrollView(size_hint=(1, 1), do_scroll_x=False, do_scroll_y=True)
+        self.detail_label = ContentLabel(text="", bg_color=(1, 1, 1, 0.85))
+        self.detail_label.halign = 'left'
+        self.scroll_view.add_widget(self.detail_label)
+        content_layout.add_widget(self.scroll_view)
+
+        back_btn = RoundedButton(text="返回列表", background_color=(0.6, 0.6, 0.6, 1))
+        back_btn.bind(on_press=lambda x: setattr(self.manager, 'current', 'encyclopedia'))
+        content_layout.add_widget(back_btn)
+
+        layout.add_widget(content_layout)
+        self.add_widget(layout)
+
+    def on_pre_enter(self, *args):
+        name = self.manager.encyclopedia_name
+        texts = data.get_hexagram_texts(name)
+        self.title_label.text = name
+        if "error" in texts:
+            self.detail_label.text = texts["error"]
+        else:
+            self.detail_label.text = "卦辞：" + texts["卦辞"] + "\n\n" + "\n\n".join(texts["爻辞"])
+        self.scroll_view.scroll_y = 1
+
+
+# 卦辞爻辞检索屏幕
+class SearchScreen(Screen):
+    def __init__(self, **kwargs):
+        super(SearchScreen, self).__init__(**kwargs)
+
+        layout = BackgroundLayout()
+
+        content_layout = BoxLayout(orientation='vertical', padding=dp(10), spacing=dp(10))
+        content_layout.add_widget(TitleLabel(text="检索卦辞爻辞"))
+
+        input_layout = BoxLayout(orientation='horizontal', spacing=dp(10), size_hint_y=None, height=dp(50))
+        self.query_input = TextInput(
+            hint_text="例如：利见大人（多个词用空格分隔）",
+            size_hint_x=3,
+            font_size=dp(16),
+            multiline=False,
+            background_color=(1, 1, 1, 0.9)
+        )
+        self.query_input.bind(on_text_validate=self.do_search)
+        input_layout.add_widget(self.query_input)
+
+        search_btn = RoundedButton(text="检索", size_hint_x=1)
+        search_btn.bind(on_press=self.do_search)
+        input_layout.add_widget(search_btn)
+        content_layout.add_widget(input_layout)
+
+        self.scroll_view = ScrollView(size_hint=(1, 1), do_scroll_x=False, do_scroll_y=True)
+        self.result_label = ContentLabel(text="", bg_color=(1, 1, 1, 0.85))
+        self.result_label.halign = 'left'
+        self.scroll_view.add_widget(self.result_label)
+        content_layout.add_widget(self.scroll_view)
+
+        back_btn = RoundedButton(text="返回", background_color=(0.6, 0.6, 0.6, 1))
+        back_btn.bind(on_press=lambda x: setattr(self.manager, 'current', 'home'))
+        content_layout.add_widget(back_btn)
+
+        layout.add_widget(content_layout)
+        self.add_widget(layout)
+
+    def do_search(self, instance):
+        query = self.query_input.text.strip()
+        if not query:
+            self.result_label.text = "请输入检索词"
+            return
+        hits = sousuo.search(query, limit=100)
+        if hits:
+            self.result_label.text = f"共{len(hits)}条结果：\n\n" + "\n\n".join(sousuo.format_hit(hit) for hit in hits)
+        else:
+            self.result_label.text = "未找到匹配的卦辞或爻辞"
+        self.scroll_view.scroll_y = 1
+
+
 # AI解析屏幕（优化移动端流式输出）
 class AIAnalysisScreen(Screen):
     def __init__(self, **kwargs):
@@ -659,11 +825,13 @@ class AIAnalysisScreen(Screen):
             self.update_status("正在发送请求...")
             response_generator = ai_main.deepseek_chat(
                 api_key="sk-********************************",  #填写你自己的deepseek APIkey（基于deepseek文档开发，其他AI接口可能不兼容）
-                prompt=f"请对以下六爻排盘信息进行解析：\n{self.manager.full_result}",
+                prompt=f"请对以下六爻排盘信息进行解析：\n{self.manager.prompt_text}",
                 stream=True,
                 max_tokens=1500,
                 temperature=0.7,
-                model="deepseek-chat"
+                model="deepseek-chat",
+                sink=shuchu.NULL_SINK,
+                cache=self.manager.ai_cache  # 同一排盘再次解析时重放缓存结果
             )
 
             # 迭代处理流式数据
@@ -717,13 +885,13 @@ class AIAnalysisScreen(Screen):
         self.analysis_label.texture_update()  # 强制刷新文本纹理
         # 自动滚动到底部
         # self.scroll_view.scroll_y = 0
-        print(f"UI更新: 已显示 {self.chunk_count} 个数据块")
+        logger.debug("UI更新: 已显示 %d 个数据块", self.chunk_count)
 
     @mainthread
     def update_status(self, text):
         """在主线程更新状态标签"""
         self.status_label.text = text
-        print(f"状态更新: {text}")
+        logger.debug("状态更新: %s", text)
 
     def restart(self, instance):
         """重新起卦"""
@@ -732,6 +900,7 @@ class AIAnalysisScreen(Screen):
         self.manager.time = None
         self.manager.reason = ""
         self.manager.full_result = ""
+        self.manager.prompt_text = ""
         self.manager.current = 'home'
 
     def on_leave(self, *args):
@@ -749,6 +918,9 @@ class HexagramApp(App):
         sm.hexagram = []
         sm.time = None
         sm.full_result = ""
+        sm.prompt_text = ""
+        sm.encyclopedia_name = ""
+        sm.ai_cache = huancun.open_cache(os.path.join(self.user_data_dir, "ai_cache.sqlite3"))
 
         sm.add_widget(HomeScreen(name='home'))
         sm.add_widget(ReasonScreen(name='reason'))
@@ -757,6 +929,9 @@ class HexagramApp(App):
         sm.add_widget(ManualTimeScreen(name='manual_time'))
         sm.add_widget(ResultScreen(name='result'))
         sm.add_widget(AIAnalysisScreen(name='ai_analysis'))
+        sm.add_widget(SearchScreen(name='search'))
+        sm.add_widget(EncyclopediaScreen(name='encyclopedia'))
+        sm.add_widget(HexagramDetailScreen(name='hexagram_detail'))
 
         return sm
 
@@ -1,6 +1,188 @@
+import asyncio
+import ssl
+import threading
+import urllib.parse
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Union
+import shuchu  # 输出目标模块
+import liushi  # 流式响应（SSE）解析模块
+import huancun  # AI回复缓存模块
+
+API_URL = "https://api.deepseek.com/chat/completions"
+DEFAULT_POOL_SIZE = 4  # 每个主机保持的长连接数
+DEFAULT_CONNECT_TIMEOUT = 5  # 建立连接超时（秒）
+DEFAULT_READ_TIMEOUT = 60  # 两次收到数据之间的最长等待（秒），流式输出时按块计算
+
+
+def build_request(api_key, prompt, stream=True, max_tokens=1024, temperature=0.7, history=None,
+                  model="deepseek-chat"):
+    """构造请求头与请求体（同步、异步客户端共用）"""
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+
+    # 构建消息列表（历史对话+当前提问）
+    messages = (history.copy() if history else []) + [
+        {"role": "user", "content": prompt}
+    ]
+
+    # 请求参数
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": stream,
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }
+    return headers, payload
+
+
+class DeepSeekClient:
+    """
+    DeepSeek接口客户端：持有带连接池的requests.Session，连接保持复用（keep-alive），
+    重复调用时省去TCP与TLS握手；可在多次调用、多个线程之间共享同一实例
+    """
+
+    def __init__(self, api_key: Optional[str] = None, url: str = API_URL, pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, read_timeout: float = DEFAULT_READ_TIMEOUT):
+        """
+        参数:
+            api_key: 默认API密钥（调用chat时可单独指定）
+            url: 接口地址
+            pool_size: 连接池大小（同时进行的请求数超过该值时多出的连接用完即关闭）
+            connect_timeout: 建立连接超时（秒）
+            read_timeout: 读取超时（秒）
+        """
+        self.api_key = api_key
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        """关闭连接池中的全部连接"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def chat(
+            self,
+            prompt: str,
+            api_key: Optional[str] = None,
+            stream: bool = True,
+            max_tokens: int = 1024,
+            temperature: float = 0.7,
+            history: Optional[List[Dict[str, str]]] = None,
+            model: str = "deepseek-chat",
+            sink=None
+    ):
+        """调用对话接口：stream为True时返回stream()的生成器，否则返回complete()的结果字典"""
+        if stream:
+            return self.stream(prompt, api_key, max_tokens, temperature, history, model, sink)
+        return self.complete(prompt, api_key, max_tokens, temperature, history, model)
+
+    def stream(
+            self,
+            prompt: str,
+            api_key: Optional[str] = None,
+            max_tokens: int = 1024,
+            temperature: float = 0.7,
+            history: Optional[List[Dict[str, str]]] = None,
+            model: str = "deepseek-chat",
+            sink=None
+    ) -> Iterator[Union[str, Dict[str, Any], None]]:
+        """
+        流式对话（生成器）：逐块产出回复文本，正常结束时最后产出None；
+        出错时产出{"error": ..., "stream": True}后结束（api_key省略时使用客户端的默认密钥）
+        """
+        headers, payload = build_request(api_key or self.api_key, prompt, True, max_tokens, temperature,
+                                         history, model)
+        try:
+            response = self.session.post(self.url, headers=headers, json=payload, stream=True, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            yield {"error": f"请求失败: {str(e)}", "stream": True}
+            return
+
+        echo = ["===== 流式输出开始 =====\n"]  # 回显内容先缓存，结束后整段写入sink
+        try:
+            try:
+                response.raise_for_status()  # 检查HTTP错误
+                # iter_content(None)收到多少交给解析器多少，不等凑满固定块大小
+                body = response.iter_content(chunk_size=None)
+                for event in liushi.iter_chat_events(body):
+                    if event.kind == liushi.DELTA:
+                        echo.append(event.text)
+                        yield event.text  # 实时返回当前块内容
+                    elif event.kind == liushi.ERROR:
+                        yield {"error": f"API错误: {event.text}", "stream": True}
+                        return
+                    elif event.kind == liushi.DONE:
+                        break
+                for _ in body:  # [DONE]之后读完响应体（分块传输的结束块），连接才会归还连接池
+                    pass
+            except requests.exceptions.RequestException as e:
+                yield {"error": f"请求失败: {str(e)}", "stream": True}
+                return
+            echo.append("\n===== 流式输出结束 =====\n")
+        finally:
+            response.close()  # 已读完时连接已归还连接池；中途停止或出错时关闭连接
+            shuchu.resolve_sink(sink).write("".join(echo))
+        yield None  # 流式结束标识
+
+    def complete(
+            self,
+            prompt: str,
+            api_key: Optional[str] = None,
+            max_tokens: int = 1024,
+            temperature: float = 0.7,
+            history: Optional[List[Dict[str, str]]] = None,
+            model: str = "deepseek-chat"
+    ) -> Dict[str, Any]:
+        """非流式对话：返回{"content": ..., "stream": False}或{"error": ..., "stream": False}"""
+        headers, payload = build_request(api_key or self.api_key, prompt, False, max_tokens, temperature,
+                                         history, model)
+        try:
+            with self.session.post(self.url, headers=headers, json=payload, timeout=self.timeout) as response:
+                response.raise_for_status()  # 检查HTTP错误
+                data = response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": f"请求失败: {str(e)}", "stream": False}
+        except ValueError as e:
+            return {"error": f"无法解析的响应: {str(e)}", "stream": False}
+
+        # 检查API错误
+        if "error" in data:
+            return {"error": f"API错误: {data['error']['message']}", "stream": False}
+
+        # 提取完整内容
+        if data.get("choices") and len(data["choices"]) > 0:
+            content = data["choices"][0]["message"].get("content", "")
+            return {"content": content, "stream": False}
+        else:
+            return {"error": "响应中未包含有效内容", "stream": False}
+
+
+_DEFAULT_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_default_client() -> DeepSeekClient:
+    """获取进程共享的默认客户端（首次调用时创建），main.ai_word与UImain均通过它复用连接"""
+    global _DEFAULT_CLIENT
+    if _DEFAULT_CLIENT is None:
+        with _CLIENT_LOCK:
+            if _DEFAULT_CLIENT is None:
+                _DEFAULT_CLIENT = DeepSeekClient()
+    return _DEFAULT_CLIENT
 
 
 def deepseek_chat(
@@ -10,8 +192,11 @@ def deepseek_chat(
         max_tokens: int = 1024,
         temperature: float = 0.7,
         history: Optional[List[Dict[str, str]]] = None,
-        model: str = "deepseek-chat"  # 支持切换模型
-) -> Dict[str, Any]:
+        model: str = "deepseek-chat",  # 支持切换模型
+        sink=None,
+        client: Optional[DeepSeekClient] = None,
+        cache=None
+) -> Union[Iterator[Union[str, Dict[str, Any], None]], Dict[str, Any]]:
     """
     调用DeepSeek API进行对话（支持流式/非流式、输出长度限制、对话历史）
 
@@ -23,85 +208,188 @@ def deepseek_chat(
         temperature: 生成随机性（0-1，默认0.7）
         history: 对话历史，格式为[{"role": "user/assistant", "content": "..."}]
         model: 模型名称（默认deepseek-reasoner，可选deepseek-chat）
+        sink: 流式内容的回显输出目标（见shuchu模块，默认使用进程默认输出目标），流结束后整段写入
+        client: 使用的DeepSeekClient（默认使用get_default_client()返回的共享客户端，连接保持复用）
+        cache: 回复缓存（huancun.ResponseCache，仅流式调用生效）；相同提问命中时按原分块重放，不再请求接口
 
     返回:
-        字典，包含"content"（完整响应内容）、"stream"（是否为流式）、"error"（错误信息，如有）
+        流式：生成器，逐块产出回复文本，正常结束时产出None，出错时产出{"error": ..., "stream": True}后结束
+        非流式：字典，包含"content"（完整响应内容）、"stream"（False）或"error"（错误信息）
     """
-    # 基础配置（使用你提供的可运行URL）
-    url = "https://api.deepseek.com/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
+    client = client or get_default_client()
+    if not stream:
+        return client.complete(prompt, api_key, max_tokens, temperature, history, model)
+    if cache is not None:
+        return _cached_stream(client, cache, api_key, prompt, max_tokens, temperature, history, model, sink)
+    return client.stream(prompt, api_key, max_tokens, temperature, history, model, sink)
 
-    # 构建消息列表（历史对话+当前提问）
-    messages = (history.copy() if history else []) + [
-        {"role": "user", "content": prompt}
-    ]
 
-    # 请求参数
-    payload = {
-        "model": model,
-        "messages": messages,
-        "stream": stream,
-        "max_tokens": max_tokens,
-        "temperature": temperature
-    }
+def _cached_stream(client, cache, api_key, prompt, max_tokens, temperature, history, model, sink):
+    """带缓存的流式调用：命中时重放缓存分块，未命中时边转发边收集，完整结束后写入缓存"""
+    key = huancun.make_key(model, temperature, prompt, history, max_tokens)
+    chunks = cache.get(key)
+    if chunks is not None:
+        shuchu.resolve_sink(sink).write("===== 流式输出开始 =====\n" + "".join(chunks) + "\n===== 流式输出结束 =====\n")
+        yield from chunks
+        yield None  # 与实时调用相同的结束标识
+        return
 
-    try:
-        # 发送请求（流式需保持连接）
-        response = requests.post(
-            url,
-            headers=headers,
-            json=payload,
-            stream=stream,
-            timeout=30  # 超时保护
-        )
-        response.raise_for_status()  # 检查HTTP错误
-
-        # 处理流式响应
-        if stream:
-            print("===== 流式输出开始 =====")
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode('utf-8').lstrip('data: ')
-                    if line_str == '[DONE]':
-                        break
-                    try:
-                        data = json.loads(line_str)
-                        if "error" in data:
-                            yield {"error": f"API错误: {data['error']['message']}", "stream": True}
+    collected = []
+    for chunk in client.stream(prompt, api_key, max_tokens, temperature, history, model, sink):
+        if isinstance(chunk, str):
+            collected.append(chunk)
+        elif chunk is None and collected:  # 正常结束（出错或中途停止时不写入）
+            cache.put(key, collected)
+        yield chunk
+
+
+# ---------------------- asyncio流式客户端 ----------------------
+async def _with_timeout(awaitable, timeout):
+    """
+    带超时等待，超时抛出asyncio.TimeoutError
+    Python 3.11起使用asyncio.timeout：wait_for在内部读取恰好完成时会吞掉同一时刻到达的取消，
+    取消流式任务后仍会一直读到服务端断开；更早的版本只能使用wait_for
+    """
+    if hasattr(asyncio, "timeout"):
+        async with asyncio.timeout(timeout):
+            return await awaitable
+    return await asyncio.wait_for(awaitable, timeout)
+
+
+class AsyncDeepSeekClient:
+    """
+    asyncio版对话客户端：在一个事件循环中同时进行大量流式解析，无需每个请求占用一个线程
+    并发数由信号量限制（超出的请求排队等待），取消任务时立即关闭对应连接
+    仅依赖标准库（asyncio流 + ssl），每个请求单独建立连接，按HTTP/1.1分块传输读取
+    """
+
+    def __init__(self, api_key: Optional[str] = None, url: str = API_URL, max_concurrency: int = 16,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, read_timeout: float = DEFAULT_READ_TIMEOUT):
+        """
+        参数:
+            api_key: 默认API密钥（调用时可单独指定）
+            url: 接口地址（http或https）
+            max_concurrency: 同时进行的请求数上限
+            connect_timeout: 建立连接超时（秒）
+            read_timeout: 两次收到数据之间的最长等待（秒）
+        """
+        self.api_key = api_key
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        parts = urllib.parse.urlsplit(url)
+        self._host = parts.hostname
+        self._port = parts.port or (443 if parts.scheme == "https" else 80)
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._ssl = ssl.create_default_context() if parts.scheme == "https" else None
+
+    async def stream(
+            self,
+            prompt: str,
+            api_key: Optional[str] = None,
+            max_tokens: int = 1024,
+            temperature: float = 0.7,
+            history: Optional[List[Dict[str, str]]] = None,
+            model: str = "deepseek-chat"
+    ):
+        """
+        流式对话（异步迭代器）：逐块产出回复文本；出错时产出{"error": ..., "stream": True}后结束
+        提前结束迭代时请使用contextlib.aclosing或调用aclose()，以便立即关闭连接、释放并发名额
+        """
+        headers, payload = build_request(api_key or self.api_key, prompt, True, max_tokens, temperature,
+                                         history, model)
+        async with self._semaphore:
+            try:
+                reader, writer = await _with_timeout(
+                    asyncio.open_connection(self._host, self._port, ssl=self._ssl,
+                                            server_hostname=self._host if self._ssl else None),
+                    self.connect_timeout
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                yield {"error": f"请求失败: {str(e) or '连接超时'}", "stream": True}
+                return
+
+            try:
+                body = json.dumps(payload).encode("utf-8")
+                head = [f"POST {self._path} HTTP/1.1", f"Host: {self._host}", "Accept: text/event-stream",
+                        f"Content-Length: {len(body)}", "Connection: close"]
+                head += [f"{key}: {value}" for key, value in headers.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+
+                status, response_headers = await self._read_head(reader)
+                chunks = self._iter_body(reader, response_headers)
+                if status != 200:
+                    raw = b"".join([chunk async for chunk in chunks])
+                    yield {"error": f"请求失败: HTTP {status} {raw.decode('utf-8', 'replace')[:200]}", "stream": True}
+                    return
+
+                parser = liushi.ChatStreamParser()
+                async for chunk in chunks:
+                    for event in parser.feed(chunk):
+                        if event.kind == liushi.DELTA:
+                            yield event.text
+                        elif event.kind == liushi.ERROR:
+                            yield {"error": f"API错误: {event.text}", "stream": True}
+                            return
+                        elif event.kind == liushi.DONE:
                             return
-                        if data.get("choices") and len(data["choices"]) > 0:
-                            delta = data["choices"][0]["delta"]
-                            content = delta.get("content", "")
-                            if content:
-                                print(content, end="", flush=True)
-                                # 关键修改：每次获取到内容就立即yield
-                                yield content  # 实时返回当前块内容
-                    except Exception:
-                        continue
-            print("\n===== 流式输出结束 =====")
-            # 流式结束后返回空标识（可选）
-            yield None  # 用于标记结束
-            return  # 不再返回完整内容字典
-
-        # 处理非流式响应
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                yield {"error": f"请求失败: {str(e) or '读取超时'}", "stream": True}
+            finally:
+                writer.close()  # 正常结束、出错或被取消时都关闭连接
+
+    async def chat(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """完整对话：收集stream的全部内容，返回{"content": ..., "stream": False}或{"error": ...}"""
+        parts = []
+        async for chunk in self.stream(prompt, **kwargs):
+            if isinstance(chunk, dict):
+                return {"error": chunk["error"], "stream": False}
+            parts.append(chunk)
+        return {"content": "".join(parts), "stream": False}
+
+    async def _readline(self, reader):
+        return await _with_timeout(reader.readline(), self.read_timeout)
+
+    async def _read_head(self, reader):
+        """读取状态行与响应头，返回(状态码, {小写头名: 值})"""
+        status_line = (await self._readline(reader)).decode("latin-1")
+        parts = status_line.split(" ", 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ValueError(f"无效的HTTP响应：{status_line.strip()}")
+        headers = {}
+        while True:
+            line = (await self._readline(reader)).decode("latin-1").strip()
+            if not line:
+                break
+            key, _, value = line.partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return int(parts[1]), headers
+
+    async def _iter_body(self, reader, headers):
+        """按响应头读取响应体（分块传输、定长或读到连接关闭），逐块产出字节"""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await self._readline(reader)).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    break
+                yield await _with_timeout(reader.readexactly(size), self.read_timeout)
+                await self._readline(reader)  # 块末尾的CRLF
+        elif "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining > 0:
+                chunk = await _with_timeout(reader.read(min(remaining, 65536)), self.read_timeout)
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
         else:
-            data = response.json()
-            # 检查API错误
-            if "error" in data:
-                return {"error": f"API错误: {data['error']['message']}", "stream": False}
-
-            # 提取完整内容
-            if data.get("choices") and len(data["choices"]) > 0:
-                content = data["choices"][0]["message"].get("content", "")
-                return {"content": content, "stream": False}
-            else:
-                return {"error": "响应中未包含有效内容", "stream": False}
-
-    except requests.exceptions.RequestException as e:
-        return {"error": f"请求失败: {str(e)}", "stream": stream}
+            while True:
+                chunk = await _with_timeout(reader.read(65536), self.read_timeout)
+                if not chunk:
+                    break
+                yield chunk
 
 
 # 示例调用（使用方式示例）
@@ -1,62 +1,226 @@
+import array
+import bisect
 import datetime
+import os
+import sys
+from collections import namedtuple
+import jichu  # 基础编码模块
+
+np = jichu.np  # 未安装numpy时为None，数组批量接口不可用
+
+# ---------------------- 节气表 ----------------------
+# jieqi.bin由gen_jieqi.py生成：1899年大雪至2100年冬至各节气的北京时间，存为距1970-01-01 00:00的分钟数（小端int32）
+# 第k项对应太阳视黄经 (255 + 15 * k) % 360 度，偶数项为“节”（大雪、小寒、立春……），即月建的分界
+JIEQI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jieqi.bin")
+JIEQI_LAST_YEAR = 2100
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _load_jieqi(path=JIEQI_PATH):
+    """读取节气表，文件缺失时返回空表（此时按固定日期近似计算）"""
+    table = array.array("i")
+    try:
+        with open(path, "rb") as f:
+            table.frombytes(f.read())
+    except OSError:
+        return table
+    if sys.byteorder != "little":
+        table.byteswap()
+    return table
+
+
+JIEQI_MINUTES = _load_jieqi()
+JIE_MINUTES = JIEQI_MINUTES[::2]  # 只保留“节”：第j项起为第j个月，月建地支编码 = j % 12
+
+
+def to_minutes(time):
+    """datetime转换为距1970-01-01 00:00的分钟数（与节气表同一时间基准）"""
+    return (time - _EPOCH) // datetime.timedelta(minutes=1)
+
+
+def jie_index(time):
+    """返回time所在节气月在JIE_MINUTES中的序号（二分查找，精确到分钟），超出节气表范围时返回None"""
+    if not JIE_MINUTES or time.year > JIEQI_LAST_YEAR:
+        return None
+    j = bisect.bisect_right(JIE_MINUTES, to_minutes(time)) - 1
+    return j if j >= 0 else None
+
+
+# 节气表范围外的近似规则：各月“节”的常见日期（1月小寒……12月大雪），过节后月建地支编码 = 月份 % 12
+_APPROX_JIE_DAYS = (6, 4, 6, 5, 6, 6, 7, 8, 8, 8, 7, 7)
+
+
 # ---------------------- 地支转换核心模块 ----------------------
 class LunarToEarthlyBranch:
-    """精确计算年月日时对应的地支"""
+    """精确计算年月日时对应的地支（*_index方法返回jichu地支编码，其余方法返回地支字符）"""
 
-    EARTHLY_BRANCHES = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+    EARTHLY_BRANCHES = list(jichu.BRANCH_NAMES)
+    _BASE_DATE = datetime.date(1900, 1, 1)
+    BASE_DAY_CYCLE = 10  # 1900年1月1日为甲戌日，在六十甲子中序号为10
 
     @staticmethod
-    def get_year_branch(year):
-        """计算年份地支（以1900年庚子年为基准）"""
+    def get_year_branch_index(year, month=None, day=None, hour=12, minute=0):
+        """计算年份地支编码（以1900年庚子年为基准）；给出月日时以立春为岁首，只给年份时按公历年计算"""
         base_year = 1900
-        offset = (year - base_year) % 12
-        return LunarToEarthlyBranch.EARTHLY_BRANCHES[offset]
-
-    @staticmethod
-    def get_month_branch(year, month, day):
-        """计算月份地支（结合节气分界）"""
-        # 节气表：(月份, 日期)，对应农历月份的起始节气
-        solar_terms = [
-            (2, 4),  # 寅月（正月）：立春
-            (3, 6),  # 卯月（二月）：惊蛰
-            (4, 5),  # 辰月（三月）：清明
-            (5, 6),  # 巳月（四月）：立夏
-            (6, 6),  # 午月（五月）：芒种
-            (7, 7),  # 未月（六月）：小暑
-            (8, 8),  # 申月（七月）：立秋
-            (9, 8),  # 酉月（八月）：白露
-            (10, 8),  # 戌月（九月）：寒露
-            (11, 7),  # 亥月（十月）：立冬
-            (12, 7),  # 子月（十一月）：大雪
-            (1, 6)  # 丑月（十二月）：小寒
-        ]
-
-        if month == 1:
-            # 1月需判断是否过小寒
-            term_month, term_day = solar_terms[11]
-            if day >= term_day:
-                return LunarToEarthlyBranch.EARTHLY_BRANCHES[11]  # 丑月
-            else:
-                return LunarToEarthlyBranch.EARTHLY_BRANCHES[10]  # 子月
-        else:
-            term_idx = month - 1
-            prev_term = solar_terms[term_idx - 1]
-            if day >= prev_term[1]:
-                return LunarToEarthlyBranch.EARTHLY_BRANCHES[term_idx - 1]
-            else:
-                return LunarToEarthlyBranch.EARTHLY_BRANCHES[term_idx - 2]
+        if month is not None:
+            year = LunarToEarthlyBranch.get_ganzhi_year(datetime.datetime(year, month, day, hour, minute))
+        return (year - base_year) % 12
+
+    @staticmethod
+    def get_year_branch(year, month=None, day=None, hour=12, minute=0):
+        """计算年份地支（以1900年庚子年为基准）"""
+        return jichu.BRANCH_NAMES[LunarToEarthlyBranch.get_year_branch_index(year, month, day, hour, minute)]
+
+    @staticmethod
+    def get_ganzhi_year(time):
+        """以立春为岁首的年份（立春前仍属上一年）"""
+        j = jie_index(time)
+        if j is not None:
+            return 1900 + (j - 2) // 12  # j=2为1900年立春
+        before_lichun = (time.month, time.day) < (2, _APPROX_JIE_DAYS[1])
+        return time.year - 1 if before_lichun else time.year
+
+    @staticmethod
+    def get_ganzhi_year_month(time):
+        """一次二分查找同时得到干支纪年年份与月地支编码（立春换年，交节换月，精确到分钟），返回(年份, 月)"""
+        j = jie_index(time)
+        if j is None:
+            year = LunarToEarthlyBranch.get_ganzhi_year(time)
+            month_branch = time.month % 12 if time.day >= _APPROX_JIE_DAYS[time.month - 1] else (time.month - 1) % 12
+            return year, month_branch
+        return 1900 + (j - 2) // 12, j % 12
+
+    @staticmethod
+    def get_pillar_branch_indexes(time):
+        """同时得到年、月地支编码，返回(年, 月)"""
+        year, month_branch = LunarToEarthlyBranch.get_ganzhi_year_month(time)
+        return (year - 1900) % 12, month_branch
+
+    @staticmethod
+    def get_month_branch_index(year, month, day, hour=12, minute=0):
+        """计算月份地支编码（按节气表交节时刻分界，未给出时刻时按当日正午计算）"""
+        time = datetime.datetime(year, month, day, hour, minute)
+        return LunarToEarthlyBranch.get_pillar_branch_indexes(time)[1]
+
+    @staticmethod
+    def get_month_branch(year, month, day, hour=12, minute=0):
+        """计算月份地支（按节气表交节时刻分界）"""
+        return jichu.BRANCH_NAMES[LunarToEarthlyBranch.get_month_branch_index(year, month, day, hour, minute)]
+
+    @staticmethod
+    def get_day_index(year, month, day):
+        """计算距1900年1月1日（甲戌日）的天数"""
+        return (datetime.date(year, month, day) - LunarToEarthlyBranch._BASE_DATE).days
+
+    @staticmethod
+    def get_day_branch_index(year, month, day):
+        """计算日地支编码（以1900年1月1日甲戌日为基准）"""
+        day_index = LunarToEarthlyBranch.get_day_index(year, month, day)
+        return (day_index + LunarToEarthlyBranch.BASE_DAY_CYCLE) % 12
 
     @staticmethod
     def get_day_branch(year, month, day):
-        """计算日地支（以1900年1月1日庚子日为基准）"""
-        base_date = datetime.date(1900, 1, 1)
-        target_date = datetime.date(year, month, day)
-        delta_days = (target_date - base_date).days
-        offset = delta_days % 12
-        return LunarToEarthlyBranch.EARTHLY_BRANCHES[offset]
+        """计算日地支（以1900年1月1日甲戌日为基准）"""
+        return jichu.BRANCH_NAMES[LunarToEarthlyBranch.get_day_branch_index(year, month, day)]
+
+    @staticmethod
+    def get_hour_branch_index(hour):
+        """计算时辰地支编码（2小时为一时辰）"""
+        hour_segment = (hour + 1) // 2  # 23-1点为0（子），1-3点为1（丑）...
+        return hour_segment % 12
 
     @staticmethod
     def get_hour_branch(hour):
         """计算时辰地支（2小时为一时辰）"""
-        hour_segment = (hour + 1) // 2  # 23-1点为0（子），1-3点为1（丑）...
-        return LunarToEarthlyBranch.EARTHLY_BRANCHES[hour_segment % 12]
\ No newline at end of file
+        return jichu.BRANCH_NAMES[LunarToEarthlyBranch.get_hour_branch_index(hour)]
+
+
+# ---------------------- 数组批量换算 ----------------------
+# 与LunarToEarthlyBranch的逐项方法语义一致，输入为numpy datetime64数组或整数时间戳数组
+# 输出的地支编码为int8数组，距1900年1月1日的天数为int64数组
+BranchArrays = namedtuple("BranchArrays", ["year", "month", "day", "hour", "day_index"])
+_DAYS_BEFORE_EPOCH = (_EPOCH.date() - LunarToEarthlyBranch._BASE_DATE).days  # 1900-01-01至1970-01-01的天数
+_TABLE_END_MINUTES = to_minutes(datetime.datetime(JIEQI_LAST_YEAR + 1, 1, 1))
+_MINUTE_FACTORS = {"m": 1, "s": 60, "ms": 60_000, "us": 60_000_000, "ns": 60_000_000_000}
+_DAY_TABLES = None  # (节气表起点分钟数, 首日序号, 每日零点所在节序号, 当日交节的分钟（不交节为1440）, 节序号->年地支, 节序号->月地支, 分钟->时地支)
+
+
+def _get_day_tables():
+    """
+    按日展开的节气表，首次调用时构建
+    相邻两节相隔约30天，一天之内至多交一个节：先按日期查出当日零点所在的节，再与当日的交节分钟比较一次即可，无需逐项二分
+    各表取最小整数类型，批量查表时结果数组也随之紧凑
+    """
+    global _DAY_TABLES
+    if _DAY_TABLES is None:
+        jie = np.frombuffer(JIE_MINUTES, dtype=np.int32).astype(np.int64) if JIE_MINUTES else np.zeros(0, np.int64)
+        start = int(jie[0]) if len(jie) else _TABLE_END_MINUTES  # 节气表缺失时全部按近似规则计算
+        first_day = start // 1440
+        days = np.arange(first_day, _TABLE_END_MINUTES // 1440 + 1)
+        day_jie = np.searchsorted(jie, days * 1440, side="right") - 1
+        next_jie = np.append(jie, np.iinfo(np.int64).max)[day_jie + 1]
+        jie_minute = np.where(next_jie // 1440 == days, next_jie - days * 1440, 1440)
+        j = np.arange(len(jie) + 1)  # 以节序号j为下标；j=-1（节气表开始之前）取末项，结果由近似规则覆盖
+        year_of_jie = ((j - 2) // 12) % 12
+        month_of_jie = j % 12
+        hour_of_minute = (np.arange(1440) // 60 + 1) // 2 % 12
+        _DAY_TABLES = (start, first_day, day_jie.astype(np.int16), jie_minute.astype(np.int16),
+                       year_of_jie.astype(np.int8), month_of_jie.astype(np.int8), hour_of_minute.astype(np.int8))
+    return _DAY_TABLES
+
+
+def to_minutes_array(times, unit="s"):
+    """
+    datetime64数组或整数时间戳数组转换为距1970-01-01 00:00的分钟数（int64，向下取整）
+    整数数组按unit（"s"、"ms"、"m"等）解释为距1970-01-01 00:00的时长，与datetime64一样按北京时间理解，不做时区换算
+    """
+    jichu.require_numpy()
+    times = np.asarray(times)
+    count = 1
+    if np.issubdtype(times.dtype, np.datetime64):
+        unit, count = np.datetime_data(times.dtype)
+    factor = _MINUTE_FACTORS.get(unit) if count == 1 else None
+    if factor is None:  # 其他单位（如"D"、"10s"）交给numpy换算
+        if not np.issubdtype(times.dtype, np.datetime64):
+            times = times.astype(np.int64).astype(f"datetime64[{unit}]")
+        return times.astype("datetime64[m]").astype(np.int64)
+    times = times.astype(np.int64)
+    return times if factor == 1 else times // factor
+
+
+def _fallback_branches(minutes):
+    """节气表范围外按固定日期近似，返回(年地支编码数组, 月地支编码数组)"""
+    times = minutes.astype("datetime64[m]")
+    month_start = times.astype("datetime64[M]")
+    year = month_start.astype("datetime64[Y]").astype(np.int64) + 1970
+    month = month_start.astype(np.int64) % 12 + 1
+    day = (times.astype("datetime64[D]") - month_start).astype(np.int64) + 1
+    after_jie = day >= np.asarray(_APPROX_JIE_DAYS)[month - 1]
+    before_lichun = (month < 2) | ((month == 2) & (day < _APPROX_JIE_DAYS[1]))
+    return (year - before_lichun - 1900) % 12, np.where(after_jie, month % 12, (month - 1) % 12)
+
+
+def _branch_arrays(minutes):
+    days = minutes // 1440
+    minute_of_day = minutes - days * 1440
+    start, first_day, day_jie, jie_minute, year_of_jie, month_of_jie, hour_of_minute = _get_day_tables()
+    offset = days - first_day  # 超出范围的下标截断到两端，结果再由近似规则覆盖
+    j = np.take(day_jie, offset, mode="clip") + (minute_of_day >= np.take(jie_minute, offset, mode="clip"))
+    year_branch = np.take(year_of_jie, j)
+    month_branch = np.take(month_of_jie, j)
+
+    fallback = (minutes < start) | (minutes >= _TABLE_END_MINUTES)
+    if fallback.any():
+        year_branch[fallback], month_branch[fallback] = _fallback_branches(minutes[fallback])
+    return year_branch, month_branch, days + _DAYS_BEFORE_EPOCH, np.take(hour_of_minute, minute_of_day)
+
+
+def batch_branch_indexes(times, unit="s"):
+    """
+    批量计算年月日时地支编码
+    :param times: datetime64数组，或按unit解释的整数时间戳数组
+    :return: BranchArrays(year, month, day, hour, day_index)，day_index为距1900年1月1日的天数
+    """
+    year_branch, month_branch, day_index, hour_branch = _branch_arrays(to_minutes_array(times, unit))
+    day_branch = ((day_index + LunarToEarthlyBranch.BASE_DAY_CYCLE) % 12).astype(np.int8)
+    return BranchArrays(year_branch, month_branch, day_branch, hour_branch, day_index)
@@ -0,0 +1,92 @@
+"""
+节气表生成脚本：计算1899年大雪至2100年冬至的全部节气时刻，写入jieqi.bin
+运行需要安装ephem库（python -m pip install ephem），仅生成数据时使用，程序运行时不需要
+
+文件格式：小端int32数组，每项为节气时刻距1970-01-01 00:00（北京时间）的分钟数
+第k项对应太阳视黄经 (255 + 15 * k) % 360 度，即从1899年大雪起依次为大雪、冬至、小寒、大寒、立春……
+用法：python gen_jieqi.py [输出路径]
+"""
+
+import array
+import datetime
+import math
+import os
+import sys
+
+import ephem
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+START_LONGITUDE = 255  # 大雪
+BEIJING_OFFSET = datetime.timedelta(hours=8)
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def nutation_longitude(date):
+    """黄经章动Δψ（度，Meeus《天文算法》第22章简化公式，精度约0.5角秒）"""
+    t = (float(date) + 2415020 - 2451545.0) / 36525  # ephem.Date以1899-12-31 12:00为起点
+    omega = math.radians(125.04452 - 1934.136261 * t)
+    sun_mean = math.radians(280.4665 + 36000.7698 * t)
+    moon_mean = math.radians(218.3165 + 481267.8813 * t)
+    arcsec = (-17.20 * math.sin(omega) - 1.32 * math.sin(2 * sun_mean)
+              - 0.23 * math.sin(2 * moon_mean) + 0.21 * math.sin(2 * omega))
+    return arcsec / 3600
+
+
+def sun_longitude(date):
+    """太阳地心视黄经（度）：ephem给出当日平春分点的几何黄经，再加章动并减去光行差"""
+    sun = ephem.Sun()
+    sun.compute(date, epoch=date)
+    geometric = math.degrees(ephem.Ecliptic(sun, epoch=date).lon)
+    aberration = 20.4898 / 3600 / sun.earth_distance
+    return geometric + nutation_longitude(date) - aberration
+
+
+def find_term(target, guess):
+    """在guess附近求太阳视黄经等于target的时刻（ephem.Date，世界时）"""
+    def diff(date):
+        return (sun_longitude(date) - target + 180) % 360 - 180
+
+    low, high = ephem.Date(guess - 10), ephem.Date(guess + 10)
+    while diff(low) > 0:
+        low = ephem.Date(low - 5)
+    while diff(high) < 0:
+        high = ephem.Date(high + 5)
+    while high - low > 1e-6:  # 约0.1秒
+        mid = ephem.Date((low + high) / 2)
+        if diff(mid) < 0:
+            low = mid
+        else:
+            high = mid
+    return ephem.Date((low + high) / 2)
+
+
+def term_minutes(date):
+    """节气时刻转换为北京时间分钟数（四舍五入到分钟）"""
+    beijing = date.datetime() + BEIJING_OFFSET
+    return int(round((beijing - EPOCH).total_seconds() / 60))
+
+
+def generate():
+    minutes = array.array("i")
+    guess = ephem.Date(datetime.datetime(FIRST_YEAR - 1, 12, 7))
+    k = 0
+    while True:
+        longitude = (START_LONGITUDE + 15 * k) % 360
+        date = find_term(longitude, guess)
+        if date.datetime().year > LAST_YEAR:
+            break
+        minutes.append(term_minutes(date))
+        guess = ephem.Date(date + 15.2)
+        k += 1
+    return minutes
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "jieqi.bin")
+    table = generate()
+    if sys.byteorder != "little":
+        table.byteswap()
+    with open(path, "wb") as f:
+        table.tofile(f)
+    print(f"已写入{len(table)}个节气时刻：{path}")
@@ -3,6 +3,11 @@ py3模块：六爻卦宫判断核心逻辑（64卦完整版）
 直接收录64卦完整信息，通过精确匹配判断，避免规则推导错误
 """
 
+from collections import namedtuple
+from types import MappingProxyType
+
+import jichu  # 基础编码模块
+
 # 64卦完整信息字典
 # 键：转换后的阴阳列表（字符串形式，便于匹配）
 # 值：卦信息（宫名、世爻索引、应爻索引、卦类型、卦名）
@@ -89,6 +94,71 @@ HEXAGRAMS = {
 }
 
 
+# ---------------------- 6位整数卦索引 ----------------------
+# 卦索引：第i爻（初爻为第0位）为阳则第i位为1，取值0-63
+# 单卦记录（不可变）：索引、宫编码、宫名、世爻索引、应爻索引、卦类型、卦名
+Hexagram = namedtuple("Hexagram", ["index", "palace", "palace_name", "shi", "ying", "type", "name"])
+
+
+def _key_to_index(key):
+    """将HEXAGRAMS的字符串键（初爻在前）转换为6位整数索引"""
+    index = 0
+    for i, bit in enumerate(key.split(",")):
+        if bit == "1":
+            index |= 1 << i
+    return index
+
+
+def _build_hexagram_table():
+    table = [None] * 64
+    for key, info in HEXAGRAMS.items():
+        index = _key_to_index(key)
+        table[index] = Hexagram(index, jichu.PALACE_INDEX[info["宫名"]], info["宫名"], info["世爻索引"],
+                                info["应爻索引"], info["卦类型"], info["卦名"])
+    return tuple(table)
+
+
+# 64卦记录表，按6位整数索引
+HEXAGRAM_TABLE = _build_hexagram_table()
+
+# 起卦编码（1-4）对应的（阳爻位, 动爻位）
+_LINE_BITS = {1: (0, 0), 2: (1, 0), 3: (1, 1), 4: (0, 1)}
+
+
+def _build_cast_table():
+    """预先计算全部4096种起卦：下标为各爻(编码-1)按2位拼接（初爻在最低位），值为(本卦索引, 变卦索引, 动爻掩码)"""
+    table = []
+    for cast_code in range(4096):
+        original = 0
+        moving = 0
+        for i in range(6):
+            yang, move = _LINE_BITS[((cast_code >> (2 * i)) & 3) + 1]
+            original |= yang << i
+            moving |= move << i
+        table.append((original, original ^ moving, moving))
+    return tuple(table)
+
+
+CAST_TABLE = _build_cast_table()
+
+
+def cast_code(hexagram):
+    """将6爻起卦编码（1-4，初爻在前）压缩为0-4095的整数"""
+    code = 0
+    for i, line in enumerate(hexagram):
+        if line not in _LINE_BITS:
+            raise ValueError(f"无效的爻值：{line}，必须是1-4")
+        code |= (line - 1) << (2 * i)
+    return code
+
+
+def resolve_cast(hexagram):
+    """根据6爻起卦编码（1-4）直接得到(本卦索引, 变卦索引, 动爻掩码)，无动爻时变卦索引等于本卦索引"""
+    if len(hexagram) != 6:
+        raise ValueError(f"需输入6爻，当前为{len(hexagram)}爻")
+    return CAST_TABLE[cast_code(hexagram)]
+
+
 def convert_hexagram(hexagram):
     """将主程序1-4编码转换为0（阴）、1（阳）"""
     converted = []
@@ -102,27 +172,23 @@ def convert_hexagram(hexagram):
     return converted
 
 
+# 卦宫信息只读视图（按6位卦索引预先生成，所有调用方共享同一对象）
+PALACE_VIEWS = tuple(
+    MappingProxyType({
+        "宫名": record.palace_name,
+        "宫编码": record.palace,
+        "世爻索引": record.shi,
+        "应爻索引": record.ying,
+        "卦类型": record.type,
+        "卦名": record.name
+    })
+    for record in HEXAGRAM_TABLE
+)
+
+
 def get_hexagram_palace(hexagram):
-    """通过64卦完整字典匹配，精确判断卦宫信息"""
+    """通过6位整数卦索引查表，精确判断卦宫信息（返回共享的只读映射，勿修改）"""
     try:
-        # 转换卦象并转为字符串键
-        converted = convert_hexagram(hexagram)
-        key = ",".join(map(str, converted))
-
-        # 精确匹配字典
-        if key in HEXAGRAMS:
-            result = HEXAGRAMS[key].copy()
-            # 确保返回格式包含必要字段
-            return {
-                "宫名": result["宫名"],
-                "世爻索引": result["世爻索引"],
-                "应爻索引": result["应爻索引"],
-                "卦类型": result["卦类型"],
-                "卦名": result["卦名"]
-            }
-        else:
-            raise ValueError(f"未找到匹配卦象：{hexagram}（转换后：{converted}）")
-
+        return PALACE_VIEWS[resolve_cast(hexagram)[0]]
     except Exception as e:
         return {"error": str(e)}
-
@@ -0,0 +1,177 @@
+"""
+huancun模块：AI解析结果的本地缓存（SQLite）
+同一张排盘（卦象、四柱、起卦原因相同）再次解析时直接返回上次的结果，省去接口延迟与tokens费用
+键为(模型, 温度, 最大输出长度, 对话历史, 规范化后的提问)的SHA-256；过期（TTL）条目读取时删除，
+总大小超过预算时按最近访问时间淘汰（LRU）；命中时按原始分块重放，界面上仍以流式逐块显示
+"""
+
+import array
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".liuyao", "ai_cache.sqlite3")
+DEFAULT_TTL = 30 * 24 * 3600  # 条目有效期（秒）
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024  # 缓存文本总大小预算（字节）
+# 提问文本中排盘时间一行的标签：main与tishi渲染时使用，规范化提问时据此忽略该行（改动标签时两边同时生效）
+TIME_LABEL = "排盘时间："
+
+logger = logging.getLogger("liuyao")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    chunks BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+def normalize_prompt(prompt):
+    """
+    规范化提问文本：合并每行内的连续空白、去掉空行，并忽略以TIME_LABEL开头的排盘时间一行
+    （同一时辰内起卦的四柱、卦象与提问其余部分完全相同，精确到分钟的时间不影响解析）
+    """
+    lines = []
+    for line in prompt.splitlines():
+        line = " ".join(line.split())
+        if line and not line.startswith(TIME_LABEL):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def make_key(model, temperature, prompt, history=None, max_tokens=None):
+    """缓存键：请求参数与规范化提问的SHA-256"""
+    material = json.dumps([model, temperature, max_tokens, history or [], normalize_prompt(prompt)],
+                          ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    AI回复缓存：get/put以分块列表存取回复文本（保留原始分块以便按流式重放）
+    同一实例可在多个线程中共享；多个进程共用同一文件时由SQLite负责加锁
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)  # 自动提交
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key):
+        """按键取回分块列表，未命中或已过期时返回None"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT content, chunks, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[2] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.evictions += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+
+        content, lengths = row[0], array.array("I")
+        lengths.frombytes(row[1])
+        chunks, pos = [], 0
+        for length in lengths:
+            chunks.append(content[pos:pos + length])
+            pos += length
+        return chunks
+
+    def put(self, key, chunks):
+        """保存一次完整回复的分块列表，随后按TTL与大小预算清理"""
+        content = "".join(chunks)
+        lengths = array.array("I", (len(chunk) for chunk in chunks))
+        size = len(content.encode("utf-8")) + len(lengths) * lengths.itemsize
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, content, lengths.tobytes(), size, now, now))
+            self.stores += 1
+            self._evict(now)
+
+    def _evict(self, now):
+        """删除过期条目，再按最近访问时间从旧到新删除，直到总大小不超过预算（调用方持有锁）"""
+        self.evictions += self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self):
+        """监控用计数：命中、未命中、写入、淘汰次数，命中率，当前条目数与总大小（字节）"""
+        with self._lock:
+            entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": total
+            }
+
+    def clear(self):
+        """清空缓存（计数不变）"""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_cache(path=DEFAULT_PATH, **kwargs):
+    """打开缓存，目录不可写或文件损坏时返回None（调用方按无缓存处理）"""
+    try:
+        return ResponseCache(path, **kwargs)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("AI回复缓存不可用（%s）：%s", path, e)
+        return None
+
+
+_DEFAULT_CACHE = None
+_DEFAULT_OPENED = False
+_CACHE_LOCK = threading.Lock()
+
+
+def get_default_cache():
+    """获取默认缓存（用户目录下的.liuyao/ai_cache.sqlite3，首次调用时打开；不可用时返回None）"""
+    global _DEFAULT_CACHE, _DEFAULT_OPENED
+    if not _DEFAULT_OPENED:
+        with _CACHE_LOCK:
+            if not _DEFAULT_OPENED:
+                _DEFAULT_CACHE = open_cache()
+                _DEFAULT_OPENED = True
+    return _DEFAULT_CACHE
@@ -0,0 +1,197 @@
+"""
+jichu模块：六爻基础编码（地支、天干、五行、卦宫、六亲）及关系位掩码矩阵
+各模块内部统一使用小整数编码计算，中文字符串只在输出展示时通过 *_NAMES 表转换
+冲、合、生、克、墓、绝、帝旺等关系预先算成矩阵，判断时只需 BRANCH_RELATION[a][b] & 关系位
+"""
+
+from enum import IntEnum
+
+try:
+    import numpy as np
+except ImportError:  # 未安装numpy时仅数组批量接口不可用
+    np = None
+
+
+def require_numpy():
+    """数组批量接口入口处调用：未安装numpy时抛出ImportError（dizhi、nongli、wangshuai、main共用jichu.np）"""
+    if np is None:
+        raise ImportError("数组批量计算需要安装numpy")
+
+
+# ---------------------- 地支 ----------------------
+class Branch(IntEnum):
+    ZI = 0  # 子
+    CHOU = 1  # 丑
+    YIN = 2  # 寅
+    MAO = 3  # 卯
+    CHEN = 4  # 辰
+    SI = 5  # 巳
+    WU = 6  # 午
+    WEI = 7  # 未
+    SHEN = 8  # 申
+    YOU = 9  # 酉
+    XU = 10  # 戌
+    HAI = 11  # 亥
+
+
+BRANCH_NAMES = ("子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥")
+BRANCH_INDEX = {name: idx for idx, name in enumerate(BRANCH_NAMES)}
+
+
+# ---------------------- 天干 ----------------------
+class Stem(IntEnum):
+    JIA = 0  # 甲
+    YI = 1  # 乙
+    BING = 2  # 丙
+    DING = 3  # 丁
+    WU = 4  # 戊
+    JI = 5  # 己
+    GENG = 6  # 庚
+    XIN = 7  # 辛
+    REN = 8  # 壬
+    GUI = 9  # 癸
+
+
+STEM_NAMES = ("甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸")
+STEM_INDEX = {name: idx for idx, name in enumerate(STEM_NAMES)}
+
+
+# ---------------------- 五行 ----------------------
+# 按相生顺序编码：(e + 1) % 5 为e所生，(e + 2) % 5 为e所克
+class Element(IntEnum):
+    MU = 0  # 木
+    HUO = 1  # 火
+    TU = 2  # 土
+    JIN = 3  # 金
+    SHUI = 4  # 水
+
+
+ELEMENT_NAMES = ("木", "火", "土", "金", "水")
+ELEMENT_INDEX = {name: idx for idx, name in enumerate(ELEMENT_NAMES)}
+
+# 地支五行（按地支编码索引）
+BRANCH_ELEMENT = (
+    Element.SHUI, Element.TU, Element.MU, Element.MU,
+    Element.TU, Element.HUO, Element.HUO, Element.TU,
+    Element.JIN, Element.JIN, Element.TU, Element.SHUI
+)
+
+# 地支五行对应表（字符串形式，供展示及旧接口使用）
+BRANCH_WUXING = {BRANCH_NAMES[b]: ELEMENT_NAMES[e] for b, e in enumerate(BRANCH_ELEMENT)}
+
+
+def generates(element):
+    """返回element所生的五行"""
+    return (element + 1) % 5
+
+
+def conquers(element):
+    """返回element所克的五行"""
+    return (element + 2) % 5
+
+
+# 五行墓库（按五行编码索引，土入四墓库）
+ELEMENT_TOMB = (
+    (Branch.WEI,),  # 木入未墓
+    (Branch.XU,),  # 火入戌墓
+    (Branch.CHEN, Branch.XU, Branch.CHOU, Branch.WEI),  # 土入四墓库
+    (Branch.CHOU,),  # 金入丑墓
+    (Branch.CHEN,)  # 水入辰墓
+)
+
+# 五行绝位（按五行编码索引，土随火行）
+ELEMENT_EXTINCTION = (Branch.SHEN, Branch.HAI, Branch.HAI, Branch.YIN, Branch.SI)
+
+# 五行帝旺位（按五行编码索引，土帝旺于四墓库）
+ELEMENT_PEAK = (
+    (Branch.MAO,),  # 木旺于卯
+    (Branch.WU,),  # 火旺于午
+    (Branch.CHEN, Branch.XU, Branch.CHOU, Branch.WEI),  # 土旺于四墓库
+    (Branch.YOU,),  # 金旺于酉
+    (Branch.ZI,)  # 水旺于子
+)
+
+
+# ---------------------- 关系位掩码 ----------------------
+# ELEMENT_RELATION[a][b]：五行b对五行a的关系；BRANCH_RELATION[a][b]：地支b对地支a的关系（同时包含两者的五行关系位）
+# 五行关系位
+REL_SAME_ELEMENT = 1 << 0  # 同五行（比和）
+REL_GENERATED_BY = 1 << 1  # b生a
+REL_CONQUERED_BY = 1 << 2  # b克a
+REL_GENERATES = 1 << 3  # a生b
+REL_CONQUERS = 1 << 4  # a克b
+# 地支关系位
+REL_SAME_BRANCH = 1 << 5  # 同支
+REL_CLASH = 1 << 6  # 六冲
+REL_COMBINE = 1 << 7  # 六合
+REL_TOMB = 1 << 8  # a入b墓
+REL_EXTINCTION = 1 << 9  # a绝于b
+REL_PEAK = 1 << 10  # a帝旺于b
+
+
+def _element_relation(a, b):
+    if a == b:
+        return REL_SAME_ELEMENT
+    if generates(b) == a:
+        return REL_GENERATED_BY
+    if conquers(b) == a:
+        return REL_CONQUERED_BY
+    if generates(a) == b:
+        return REL_GENERATES
+    return REL_CONQUERS
+
+
+def _branch_relation(a, b):
+    element = BRANCH_ELEMENT[a]
+    relation = ELEMENT_RELATION[element][BRANCH_ELEMENT[b]]
+    if a == b:
+        relation |= REL_SAME_BRANCH
+    if (a - b) % 12 == 6:  # 对宫相冲
+        relation |= REL_CLASH
+    if (a + b) % 12 == 1:  # 子丑、寅亥、卯戌、辰酉、巳申、午未
+        relation |= REL_COMBINE
+    if b in ELEMENT_TOMB[element]:
+        relation |= REL_TOMB
+    if b == ELEMENT_EXTINCTION[element]:
+        relation |= REL_EXTINCTION
+    if b in ELEMENT_PEAK[element]:
+        relation |= REL_PEAK
+    return relation
+
+
+ELEMENT_RELATION = tuple(tuple(_element_relation(a, b) for b in range(5)) for a in range(5))
+BRANCH_RELATION = tuple(tuple(_branch_relation(a, b) for b in range(12)) for a in range(12))
+
+
+# ---------------------- 卦宫 ----------------------
+class Palace(IntEnum):
+    QIAN = 0  # 乾宫
+    KUN = 1  # 坤宫
+    ZHEN = 2  # 震宫
+    XUN = 3  # 巽宫
+    KAN = 4  # 坎宫
+    LI = 5  # 离宫
+    GEN = 6  # 艮宫
+    DUI = 7  # 兑宫
+
+
+PALACE_NAMES = ("乾宫", "坤宫", "震宫", "巽宫", "坎宫", "离宫", "艮宫", "兑宫")
+PALACE_INDEX = {name: idx for idx, name in enumerate(PALACE_NAMES)}
+
+
+# ---------------------- 六亲 ----------------------
+# 编码取值 = (目标五行 - 我五行) % 5，可直接由五行编码相减得到
+class Relative(IntEnum):
+    XIONGDI = 0  # 兄弟：同我
+    ZISUN = 1  # 子孙：我生
+    QICAI = 2  # 妻财：我克
+    GUANGUI = 3  # 官鬼：克我
+    FUMU = 4  # 父母：生我
+
+
+RELATIVE_NAMES = ("兄弟", "子孙", "妻财", "官鬼", "父母")
+
+
+def relative_of(wo_element, target_element):
+    """根据世爻五行（我）与目标五行计算六亲编码"""
+    return Relative((target_element - wo_element) % 5)
@@ -0,0 +1,235 @@
+"""
+liushi模块：流式对话响应（SSE，server-sent events）的增量解析
+直接接收网络上读到的原始字节块，事件可以在任意位置被切开；缓冲区只保留尚未结束的半行，每个字节只进出缓冲区一次
+解析结果为带类型的事件：delta（回复文本）、usage（用量统计）、error（接口或数据错误）、done（流结束）
+用法：python liushi.py [录制的响应文件...]  对录制的流（省略时使用生成的样例流）测试解析吞吐量
+"""
+
+import json
+import random
+import sys
+import time
+from collections import namedtuple
+
+# ---------------------- 事件类型 ----------------------
+DELTA = "delta"
+USAGE = "usage"
+ERROR = "error"
+DONE = "done"
+
+# 对话流事件：kind为上面四种之一；text为回复文本或错误信息；data为usage字典或原始JSON对象
+ChatEvent = namedtuple("ChatEvent", ["kind", "text", "data"])
+DONE_EVENT = ChatEvent(DONE, "", None)
+
+# SSE原始事件：事件名（未指定时为"message"）与data字段（多行data以换行连接）
+SSEEvent = namedtuple("SSEEvent", ["event", "data"])
+
+
+# ---------------------- SSE解析 ----------------------
+class SSEParser:
+    """
+    SSE增量解析器：feed(字节块)返回本块中已完整结束的SSEEvent列表
+    支持多行data、注释行（以冒号开头）、event字段与CRLF换行；id、retry字段不影响对话流，直接忽略
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._event = ""
+        self._data = []
+
+    def feed(self, chunk):
+        buffer = self._buffer
+        last = chunk.rfind(b"\n")
+        if last < 0:  # 本块没有换行，只追加（不扫描缓冲区中已有的半行）
+            buffer += chunk
+            return []
+        last += len(buffer)
+        buffer += chunk
+        lines = buffer[:last].split(b"\n")  # 只切出已完整的行，剩余半行留在缓冲区
+        del buffer[:last + 1]
+
+        events = []
+        for line in lines:
+            if line[-1:] == b"\r":
+                line = line[:-1]
+            if not line:  # 空行：分派事件
+                if self._data:
+                    events.append(SSEEvent(self._event or "message", "\n".join(self._data)))
+                    self._data = []
+                self._event = ""
+                continue
+            name, _, value = line.partition(b":")
+            if not name:  # 以冒号开头为注释行（常用作心跳）
+                continue
+            if value[:1] == b" ":
+                value = value[1:]
+            # 非法UTF-8字节替换为U+FFFD（SSE规范的解码方式），不抛出异常；同步、异步客户端行为一致
+            if name == b"data":
+                self._data.append(value.decode("utf-8", "replace"))
+            elif name == b"event":
+                self._event = value.decode("utf-8", "replace")
+        return events
+
+    def close(self):
+        """流结束：按规范丢弃未以空行结束的事件，返回空列表（供调用方统一处理）"""
+        self._buffer.clear()
+        self._event = ""
+        self._data = []
+        return []
+
+
+# ---------------------- 对话流解析 ----------------------
+_raw_decode = json.JSONDecoder().raw_decode  # 省去json.loads每次的类型判断与首尾空白匹配
+
+
+def completion_events(sse_event):
+    """将一个SSE事件解析为对话流事件列表（chat/completions流式格式）"""
+    if sse_event.data == "[DONE]":
+        return [DONE_EVENT]
+    text = sse_event.data.strip()
+    try:
+        data, end = _raw_decode(text)
+        if end != len(text):
+            raise ValueError(f"多余的数据（第{end}个字符起）")
+    except ValueError as e:
+        return [ChatEvent(ERROR, f"无法解析的流数据：{e}", sse_event.data)]
+    if not isinstance(data, dict):
+        return [ChatEvent(ERROR, "无法解析的流数据：不是JSON对象", data)]
+
+    if "error" in data:
+        error = data["error"]
+        message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+        return [ChatEvent(ERROR, message, data)]
+
+    events = []
+    choices = data.get("choices")
+    if choices:
+        content = (choices[0].get("delta") or {}).get("content")
+        if content:
+            events.append(ChatEvent(DELTA, content, data))
+    if data.get("usage"):
+        events.append(ChatEvent(USAGE, "", data["usage"]))
+    return events
+
+
+class ChatStreamParser:
+    """对话流增量解析器：feed(字节块)返回ChatEvent列表，同步与asyncio客户端共用"""
+
+    def __init__(self):
+        self._sse = SSEParser()
+
+    def feed(self, chunk):
+        events = []
+        for sse_event in self._sse.feed(chunk):
+            if sse_event.event in ("message", "error"):
+                events.extend(completion_events(sse_event))
+        return events
+
+    def close(self):
+        return self._sse.close()
+
+
+def iter_chat_events(chunks):
+    """逐个产出字节块迭代器（如requests的iter_content）中的ChatEvent"""
+    parser = ChatStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    parser.close()
+
+
+# ---------------------- 吞吐量测试 ----------------------
+def sample_stream(n_deltas=20000, seed=0):
+    """生成与DeepSeek流式响应格式相同的样例流（逐字回复，末尾附用量与[DONE]）"""
+    rnd = random.Random(seed)
+    text = "初九潜龙勿用九二见龙在田利见大人，君子终日乾乾夕惕若厉无咎。或跃在渊飞龙在天亢龙有悔"
+    parts = []
+    for i in range(n_deltas):
+        chunk = {
+            "id": "chatcmpl-0", "object": "chat.completion.chunk", "created": 1700000000, "model": "deepseek-chat",
+            "system_fingerprint": "fp_0", "choices": [{"index": 0, "delta": {"content": text[rnd.randrange(len(text))]},
+                                                       "logprobs": None, "finish_reason": None}]
+        }
+        parts.append("data: " + json.dumps(chunk, ensure_ascii=False) + "\n\n")
+        if i % 500 == 0:
+            parts.append(": keep-alive\n\n")
+    usage = {"prompt_tokens": 900, "completion_tokens": n_deltas, "total_tokens": 900 + n_deltas}
+    parts.append("data: " + json.dumps({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                                        "usage": usage}) + "\n\n")
+    parts.append("data: [DONE]\n\n")
+    return "".join(parts).encode("utf-8")
+
+
+def split_chunks(raw, seed=0, max_size=1500):
+    """把录制的流按随机大小切块，模拟网络分包（切点可落在事件、行与多字节字符中间）"""
+    rnd = random.Random(seed)
+    chunks, pos = [], 0
+    while pos < len(raw):
+        size = rnd.randint(1, max_size)
+        chunks.append(raw[pos:pos + size])
+        pos += size
+    return chunks
+
+
+def _parse_iter_lines(chunks):
+    """旧做法：requests.iter_lines的分行方式 + lstrip('data: ') + json.loads，用作对照"""
+    contents, pending = [], None
+    for chunk in chunks:
+        if pending is not None:
+            chunk = pending + chunk
+        lines = chunk.splitlines()
+        pending = lines.pop() if lines and lines[-1] and lines[-1][-1] == chunk[-1] else None
+        for line in lines:
+            if line:
+                line_str = line.decode("utf-8").lstrip("data: ")
+                if line_str == "[DONE]":
+                    return contents
+                try:
+                    data = json.loads(line_str)
+                    if data.get("choices"):
+                        content = data["choices"][0]["delta"].get("content", "")
+                        if content:
+                            contents.append(content)
+                except Exception:
+                    continue
+    return contents
+
+
+def _parse_incremental(chunks):
+    parser = ChatStreamParser()
+    contents = []
+    for chunk in chunks:
+        for event in parser.feed(chunk):
+            if event.kind == DELTA:
+                contents.append(event.text)
+            elif event.kind == DONE:
+                return contents
+    return contents
+
+
+def benchmark(streams, repeat=5):
+    """对每条录制的流比较两种解析方式的吞吐量（取repeat次中最快的一次）"""
+    for name, raw in streams:
+        chunks = split_chunks(raw)
+        print(f"{name}：{len(raw) / 1e6:.2f} MB，{len(chunks)}个数据块")
+        expected = None
+        for label, parse in (("iter_lines + lstrip（旧）", _parse_iter_lines), ("增量SSE解析", _parse_incremental)):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                contents = parse(chunks)
+                best = min(best, time.perf_counter() - start)
+            expected = expected if expected is not None else contents
+            same = "一致" if contents == expected else "不一致"
+            print(f"  {label:<22} {len(raw) / best / 1e6:7.1f} MB/s  {len(contents) / best / 1e3:8.0f} k事件/s  "
+                  f"回复文本与旧做法{same}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        recorded = []
+        for path in sys.argv[1:]:
+            with open(path, "rb") as f:
+                recorded.append((path, f.read()))
+    else:
+        recorded = [("样例流（20000个delta事件）", sample_stream())]
+    benchmark(recorded)
@@ -1,17 +1,29 @@
 """
 使用前须知：
-arrange_hexagram(original_hexagram, time, reason)函数为本模块关键函数，返回值为排盘所有内容。
+arrange(original_hexagram, time, reason)函数为本模块关键函数，返回ArrangeResult（排盘结果、完整文本、AI提问文本），可在多线程中并发调用。
+arrange_hexagram(original_hexagram, time, reason)为旧接口，返回值为排盘所有内容。
 具体调用方法可参考github说明或下载的md文档文件
-若要使用AI解析功能，请更改Deepseek APIkey值（约在代码540行处）
-ai_text变量存储了向ai提问的必要文本（即省略了相关备忘信息和分割线，以便节省tokens）
+若要使用AI解析功能，请更改Deepseek APIkey值（ai_word函数中的api_key，约在代码560行处）
+ai_text变量存储了最近一次arrange_hexagram调用的向ai提问文本（多线程下会互相覆盖，新代码请使用arrange().ai_text）
 """
 
 import datetime
+import functools
+import sys
+from collections import namedtuple
+import jichu  # 基础编码模块（地支、天干、五行、卦宫、六亲整数编码）
 import dizhi  # 时间地支转换模块
+import sizhu  # 四柱干支模块
+import nongli  # 农历模块
 import guagong  # 卦宫判断模块
 import wangshuai  # 旺衰判断模块
 import data  # 卦辞和爻辞存储模块
 import ai_main  # 调用deepseek-chat 模块
+import huancun  # AI回复缓存模块
+import tishi  # AI提问文本模块
+import shuchu  # 输出目标模块
+
+np = jichu.np  # 未安装numpy时为None，数组批量接口不可用
 
 # ---------------------- 六爻核心配置数据 ----------------------
 HEXAGRAM_EARTHLY_BRANCH = {
@@ -25,141 +37,151 @@ HEXAGRAM_EARTHLY_BRANCH = {
     "兑宫": ["巳", "卯", "丑", "亥", "酉", "未"]
 }
 
-BRANCH_WUXING = {
-    "子": "水", "丑": "土", "寅": "木", "卯": "木",
-    "辰": "土", "巳": "火", "午": "火", "未": "土",
-    "申": "金", "酉": "金", "戌": "土", "亥": "水"
-}
+# 纳甲地支编码（按jichu卦宫编码索引）
+PALACE_NAJIA = tuple(
+    tuple(jichu.BRANCH_INDEX[branch] for branch in HEXAGRAM_EARTHLY_BRANCH[palace])
+    for palace in jichu.PALACE_NAMES
+)
+
+BRANCH_WUXING = jichu.BRANCH_WUXING
 
 LIUSHOU = ["青龙", "朱雀", "勾陈", "螣蛇", "白虎", "玄武"]
 
-# 旬空计算所需配置
-XUN_START = ["甲子", "甲戌", "甲申", "甲午", "甲辰", "甲寅"]
-XUN_END = ["癸酉", "癸未", "癸巳", "癸卯", "癸丑", "癸亥"]
-XUN_KONG = {
-    "甲子": ["戌", "亥"],
-    "甲戌": ["申", "酉"],
-    "甲申": ["午", "未"],
-    "甲午": ["辰", "巳"],
-    "甲辰": ["寅", "卯"],
-    "甲寅": ["子", "丑"]
-}
-GAN_ORDER = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
-ZHI_ORDER = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+GAN_ORDER = list(jichu.STEM_NAMES)
+ZHI_ORDER = list(jichu.BRANCH_NAMES)
 
 
 # ---------------------- 计算日天干的函数 ----------------------
+def get_day_stem_index(year, month, day):
+    """根据日期计算日天干编码（以1900年1月1日甲戌日为基准）"""
+    delta_days = dizhi.LunarToEarthlyBranch.get_day_index(year, month, day)
+    return sizhu.JIAZI_STEM[sizhu.day_cycle(delta_days)]
+
+
 def get_day_stem(year, month, day):
-    """根据日期计算日天干（以1900年1月1日庚子日为基准）"""
-    base_date = datetime.date(1900, 1, 1)
-    target_date = datetime.date(year, month, day)
-    delta_days = (target_date - base_date).days
-    base_gan_index = 6  # 1900年1月1日是庚子日，天干为"庚"
-    gan_index = (base_gan_index + delta_days) % 10
-    return GAN_ORDER[gan_index]
+    """根据日期计算日天干（以1900年1月1日甲戌日为基准）"""
+    return GAN_ORDER[get_day_stem_index(year, month, day)]
 
 
 # ---------------------- 旬空计算函数 ----------------------
 def get_xunkong(day_ganzhi):
-    day_gan = day_ganzhi[0]
-    day_zhi = day_ganzhi[1]
-    day_gan_idx = GAN_ORDER.index(day_gan)
-    day_zhi_idx = ZHI_ORDER.index(day_zhi)
-    day_total_idx = day_gan_idx * 12 + day_zhi_idx
-
-    for i in range(len(XUN_START)):
-        start_gan = XUN_START[i][0]
-        start_zhi = XUN_START[i][1]
-        end_gan = XUN_END[i][0]
-        end_zhi = XUN_END[i][1]
-
-        start_gan_idx = GAN_ORDER.index(start_gan)
-        start_zhi_idx = ZHI_ORDER.index(start_zhi)
-        start_total_idx = start_gan_idx * 12 + start_zhi_idx
-
-        end_gan_idx = GAN_ORDER.index(end_gan)
-        end_zhi_idx = ZHI_ORDER.index(end_zhi)
-        end_total_idx = end_gan_idx * 12 + end_zhi_idx
-
-        if i == len(XUN_START) - 1:  # 甲寅旬特殊处理
-            if day_total_idx >= start_total_idx or day_total_idx <= end_total_idx:
-                return XUN_KONG[XUN_START[i]]
-        else:
-            if start_total_idx <= day_total_idx <= end_total_idx:
-                return XUN_KONG[XUN_START[i]]
-    return ["", ""]  # 理论上不会触发
+    """根据日干支（如“甲子”）查旬空，返回两个地支字符；干支无效时返回["", ""]"""
+    cycle = sizhu.JIAZI_INDEX.get(day_ganzhi)
+    if cycle is None:
+        return ["", ""]
+    return [ZHI_ORDER[branch] for branch in sizhu.XUNKONG[cycle]]
+
+
+# ---------------------- 数组批量换算 ----------------------
+CalendarArrays = namedtuple("CalendarArrays", ["year", "month", "day", "hour", "day_stem", "xunkong"])
+
+
+def batch_calendar(times, unit="s"):
+    """
+    批量计算年月日时地支、日天干与旬空（逐项与dizhi、get_day_stem_index、get_xunkong一致）
+    :param times: numpy datetime64数组，或按unit解释的整数时间戳数组（距1970-01-01 00:00，北京时间）
+    :return: CalendarArrays，各字段为jichu编码的int8数组，xunkong形状为(N, 2)
+    """
+    jichu.require_numpy()
+    branches = dizhi.batch_branch_indexes(times, unit)
+    cycle = (branches.day_index + dizhi.LunarToEarthlyBranch.BASE_DAY_CYCLE) % 60
+    day_stem = np.take(np.array(sizhu.JIAZI_STEM, dtype=np.int8), cycle)
+    xunkong = np.take(np.array(sizhu.XUNKONG, dtype=np.int8), cycle, axis=0)
+    return CalendarArrays(branches.year, branches.month, branches.day, branches.hour, day_stem, xunkong)
 
 
 def get_liqin(wo_wuxing, target_wuxing):
     if not wo_wuxing or not target_wuxing:
         return ""
-    if target_wuxing == wo_wuxing:
-        return "兄弟"
-    elif (wo_wuxing == "木" and target_wuxing == "水") or \
-            (wo_wuxing == "火" and target_wuxing == "木") or \
-            (wo_wuxing == "土" and target_wuxing == "火") or \
-            (wo_wuxing == "金" and target_wuxing == "土") or \
-            (wo_wuxing == "水" and target_wuxing == "金"):
-        return "父母"
-    elif (wo_wuxing == "木" and target_wuxing == "火") or \
-            (wo_wuxing == "火" and target_wuxing == "土") or \
-            (wo_wuxing == "土" and target_wuxing == "金") or \
-            (wo_wuxing == "金" and target_wuxing == "水") or \
-            (wo_wuxing == "水" and target_wuxing == "木"):
-        return "子孙"
-    elif (wo_wuxing == "木" and target_wuxing == "金") or \
-            (wo_wuxing == "火" and target_wuxing == "水") or \
-            (wo_wuxing == "土" and target_wuxing == "木") or \
-            (wo_wuxing == "金" and target_wuxing == "火") or \
-            (wo_wuxing == "水" and target_wuxing == "土"):
-        return "官鬼"
-    else:
-        return "妻财"
+    relative = jichu.relative_of(jichu.ELEMENT_INDEX[wo_wuxing], jichu.ELEMENT_INDEX[target_wuxing])
+    return jichu.RELATIVE_NAMES[relative]
 
 
 # ---------------------- 入墓扩展判断 ----------------------
 def check_additional_tomb(original_hexagram, original_branch, changed_branch, strengths, is_original=True):
-    positions = ["初爻", "二爻", "三爻", "四爻", "五爻", "上爻"]
+    """静爻入动爻墓、动爻入变爻墓、变爻入本位动爻墓（地支为jichu编码，结果并入strengths[i]["flags"]）"""
     moving_indices = [i for i, line in enumerate(original_hexagram) if line in [3, 4]]
 
     for i in range(6):
         yao_branch = original_branch[i] if is_original else changed_branch[i]
-        yao_wuxing = BRANCH_WUXING[yao_branch]
-        tomb_branches = wangshuai.TOMB_BRANCH[yao_wuxing]
-        if not isinstance(tomb_branches, list):
-            tomb_branches = [tomb_branches]
+        relation = jichu.BRANCH_RELATION[yao_branch]  # 各地支对本爻的关系位
 
         if is_original and original_hexagram[i] not in [3, 4]:  # 静爻
             for idx in moving_indices:
-                mb = original_branch[idx]
-                if mb in tomb_branches:
-                    strengths[i]["status"].append(f"入{positions[idx]}墓")
+                if relation[original_branch[idx]] & jichu.REL_TOMB:
+                    strengths[i]["flags"] |= wangshuai.TOMB_LINE_BITS[idx]
 
         if is_original and original_hexagram[i] in [3, 4]:  # 动爻
             if changed_branch and i < len(changed_branch):
-                changed_yao = changed_branch[i]
-                if changed_yao in tomb_branches:
-                    strengths[i]["status"].append("入变爻墓")
+                if relation[changed_branch[i]] & jichu.REL_TOMB:
+                    strengths[i]["flags"] |= wangshuai.STATUS_BITS["入变爻墓"]
 
         if not is_original and i in moving_indices:  # 变卦中对应本卦动爻的位置
-            original_yao = original_branch[i]
-            if original_yao in tomb_branches:
-                strengths[i]["status"].append("入本位动爻墓")
+            if relation[original_branch[i]] & jichu.REL_TOMB:
+                strengths[i]["flags"] |= wangshuai.STATUS_BITS["入本位动爻墓"]
     return strengths
 
 
 # ---------------------- 回头生克判断 ----------------------
 def check_huitou(original_branch, changed_branch, moving_indices, changed_strength):
+    """变爻回头生/回头克本位动爻（地支为jichu编码，结果并入changed_strength[i]["flags"]）"""
     for i in moving_indices:
-        original_wuxing = BRANCH_WUXING[original_branch[i]]
-        changed_wuxing = BRANCH_WUXING[changed_branch[i]]
-        if wangshuai.GENERATE_WUXING.get(changed_wuxing) == original_wuxing:
-            changed_strength[i]["status"].append("回头生")
-        if wangshuai.CONQUER_WUXING.get(changed_wuxing) == original_wuxing:
-            changed_strength[i]["status"].append("回头克")
+        relation = jichu.BRANCH_RELATION[original_branch[i]][changed_branch[i]]  # 变爻对本位动爻的关系位
+        if relation & jichu.REL_GENERATED_BY:
+            changed_strength[i]["flags"] |= wangshuai.STATUS_BITS["回头生"]
+        if relation & jichu.REL_CONQUERED_BY:
+            changed_strength[i]["flags"] |= wangshuai.STATUS_BITS["回头克"]
     return changed_strength
 
 
+# ---------------------- 64卦静态排盘表 ----------------------
+# 与日期无关的部分（纳甲、六亲、世应）按6位卦索引预先算好，排盘时直接取用
+HexagramChart = namedtuple("HexagramChart", ["info", "branches", "relatives", "shi_ying"])
+
+
+def _shi_ying_marks(shi_yao_idx, ying_yao_idx):
+    return tuple(" + " if i == shi_yao_idx else " * " if i == ying_yao_idx else "---" for i in range(6))
+
+
+def _build_hexagram_charts():
+    table = []
+    for info in guagong.HEXAGRAM_TABLE:
+        branches = PALACE_NAJIA[info.palace]
+        shi_wuxing = jichu.BRANCH_ELEMENT[branches[info.shi]]
+        relatives = tuple(jichu.relative_of(shi_wuxing, jichu.BRANCH_ELEMENT[branch]) for branch in branches)
+        table.append(HexagramChart(info, branches, relatives, _shi_ying_marks(info.shi, info.ying)))
+    return tuple(table)
+
+
+HEXAGRAM_CHARTS = _build_hexagram_charts()
+
+# 动爻掩码 -> 动爻索引（初爻为0）
+MOVING_INDICES = tuple(tuple(i for i in range(6) if mask >> i & 1) for mask in range(64))
+
+
+@functools.lru_cache(maxsize=None)
+def _cast_flags(original_index, moving_mask):
+    """
+    本卦/变卦与日期无关的状态位（入动爻墓、入变爻墓、入本位动爻墓、回头生克），每种起卦只计算一次
+    :return: (本卦六爻状态位, 变卦六爻状态位)，无动爻时变卦为None
+    """
+    # 由卦索引与动爻掩码还原1-4起卦编码
+    original_hexagram = [(3 if moving_mask >> i & 1 else 2) if original_index >> i & 1 else
+                         (4 if moving_mask >> i & 1 else 1) for i in range(6)]
+    original_branch = HEXAGRAM_CHARTS[original_index].branches
+    changed_branch = HEXAGRAM_CHARTS[original_index ^ moving_mask].branches if moving_mask else None
+
+    original_flags = check_additional_tomb(original_hexagram, original_branch, changed_branch,
+                                           [{"flags": 0} for _ in range(6)], is_original=True)
+    if not moving_mask:
+        return tuple(item["flags"] for item in original_flags), None
+
+    changed_flags = check_additional_tomb(original_hexagram, original_branch, changed_branch,
+                                          [{"flags": 0} for _ in range(6)], is_original=False)
+    changed_flags = check_huitou(original_branch, changed_branch, MOVING_INDICES[moving_mask], changed_flags)
+    return tuple(item["flags"] for item in original_flags), tuple(item["flags"] for item in changed_flags)
+
+
 # ---------------------- 主程序功能 ----------------------
 def get_user_input():
     print("六爻排盘程序（含纳甲、六兽、六亲、旺衰）")
@@ -224,317 +246,314 @@ def generate_changed_hexagram(original):
 
 
 def get_liushou_order(day_branch):
-    branch_order = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
-    day_idx = branch_order.index(day_branch)
-    start_idx = day_idx % 6
+    """根据日支编码排六兽（初爻到上爻）"""
+    start_idx = day_branch % 6
     return [LIUSHOU[(start_idx + i) % 6] for i in range(6)]
 
 
-ai_text = ""  #初始化全局变量ai_text
+# ---------------------- 排盘结果结构 ----------------------
+# 单爻排盘结果（编码形式，渲染时再转为文字；flags为状态位掩码，见wangshuai.STATUS_NAMES）
+class YaoRow(namedtuple("YaoRow", ["line", "beast", "relative", "branch", "shi_ying", "score", "flags"])):
+    __slots__ = ()
+
+    @property
+    def status(self):
+        """状态术语元组（读取时才由flags转为文字）"""
+        return wangshuai.status_names(self.flags)
+
+
+# 完整排盘结果（计算与文本渲染分离，按需调用render_*生成文字）
+Chart = namedtuple("Chart", [
+    "time", "reason",
+    "year_branch", "month_branch", "day_branch", "hour_branch", "day_stem", "xunkong", "pillars", "lunar",
+    "original_hexagram", "original_info", "original_rows",
+    "changed_hexagram", "changed_info", "changed_rows",
+    "moving_lines"
+])
+
+POSITIONS = ["初爻", "二爻", "三爻", "四爻", "五爻", "上爻"]
+LINE_NAMES = {1: "少阴", 2: "少阳", 3: "纯阳", 4: "纯阴"}
+LINE_SYMBOLS = {
+    1: "-- --",  # 少阴
+    2: "-----",  # 少阳
+    3: "-----",  # 纯阳（动）
+    4: "-- --"  # 纯阴（动）
+}
+MOVING_MARKS = {3: "  →", 4: "  →", 1: "   ", 2: "   "}
+TABLE_HEADER = "六兽       六亲        爻位      世应（+为世）卦象         地支(五行)          类型           旺衰得分            状态"
 
+# 备忘信息
+MEMO_TEXT = """\n============================================================================================================================================
+\n地支相合：子丑合土局（水）; 寅亥合木局;卯戌合火局; 辰酉合金局; 巳申合水局; 午未合土局
+地支相冲：子午；丑未；寅申；卯酉；辰戌；巳亥
+木长生在亥，旺在卯，墓在未，绝于申；
+金长生在巳，旺在酉，墓在丑，绝于寅；
+火长生在寅，旺在午，墓在戌，绝于亥；
+水长生在申，旺在子，墓在辰，绝于巳；
+土随火行：长生在寅，绝于亥；墓于四墓库，旺于四墓库
 
-def arrange_hexagram(original_hexagram, time, reason):
-    # 初始化存储完整输出的变量
-    ai_txt = []
-    full_txt = []
-    positions = ["初爻", "二爻", "三爻", "四爻", "五爻", "上爻"]
-    line_names = {1: "少阴", 2: "少阳", 3: "纯阳", 4: "纯阴"}
-    line_symbols = {
-        1: "-- --",  # 少阴
-        2: "-----",  # 少阳
-        3: "-----",  # 纯阳（动）
-        4: "-- --"  # 纯阴（动）
-    }
-    moving_marks = {3: "  →", 4: "  →", 1: "   ", 2: "   "}
+    季节    旺  相  休  囚  死
+    春季    木  火  水  金  土
+    夏季    火  土  木  水  金
+    秋季    金  水  土  火  木
+    冬季    水  木  金  土  火
+    季末    土  金  火  木  水 """
 
-    # 1. 计算时间地支和旬空
-    year_branch = dizhi.LunarToEarthlyBranch.get_year_branch(time.year)
-    month_branch = dizhi.LunarToEarthlyBranch.get_month_branch(time.year, time.month, time.day)
-    day_branch = dizhi.LunarToEarthlyBranch.get_day_branch(time.year, time.month, time.day)
-    day_stem = get_day_stem(time.year, time.month, time.day)
-    day_ganzhi = day_stem + day_branch  # 日干支
-    xunkong = get_xunkong(day_ganzhi)  # 计算旬空
-    hour_branch = dizhi.LunarToEarthlyBranch.get_hour_branch(time.hour)
+
+def _build_rows(hexagram, static, strengths, extra_flags, liushou_order):
+    """组合六爻排盘结果（初爻到上爻）：静态表 + 当日旺衰（共享的YaoStrength）与六兽"""
+    return tuple(
+        YaoRow(hexagram[i], liushou_order[i], static.relatives[i], static.branches[i], static.shi_ying[i],
+               strengths[i].score, strengths[i].flags | extra_flags[i])
+        for i in range(6)
+    )
+
+
+def compute_chart(original_hexagram, time, reason):
+    """计算排盘结果（不做任何文字格式化或输出），返回Chart"""
+
+    # 1. 四柱与旬空（只做一次日期换算，其余查六十甲子表；地支均为jichu编码，输出时再转为文字）
+    pillars = sizhu.get_pillars(time)
+    year_branch, month_branch, day_branch, hour_branch = (sizhu.JIAZI_BRANCH[n] for n in pillars[:4])
+    day_stem = sizhu.JIAZI_STEM[pillars.day]
+    xunkong = pillars.xunkong
+    lunar = nongli.from_day_index(pillars.day_index)  # 农历（复用四柱的日序号）
 
     # 2. 六兽顺序
     liushou_order = get_liushou_order(day_branch)
 
-    # 3. 本卦信息
-    original_info = guagong.get_hexagram_palace(original_hexagram)
-    original_type = original_info["宫名"]
-    original_hex_name = original_info["卦名"]
-    original_branch = HEXAGRAM_EARTHLY_BRANCH[original_type]
+    # 3. 本卦、变卦索引与动爻掩码（查表，变卦索引 = 本卦索引 ^ 动爻掩码），纳甲、六亲、世应取自静态卦表
+    original_index, changed_index, moving_mask = guagong.resolve_cast(original_hexagram)
+    original_static = HEXAGRAM_CHARTS[original_index]
+    original_info = original_static.info
+    original_branch = original_static.branches
 
     # 4. 变卦信息
-    has_moving = any(line in [3, 4] for line in original_hexagram)
+    has_moving = moving_mask != 0
     changed_hexagram = generate_changed_hexagram(original_hexagram) if has_moving else None
+    changed_static = HEXAGRAM_CHARTS[changed_index] if has_moving else None
+    changed_info = changed_static.info if has_moving else None
+    changed_branch = changed_static.branches if has_moving else None
 
-    # 强制验证变卦是否与本卦不同
-    if has_moving and changed_hexagram == original_hexagram:
-        full_txt.append("\n警告：检测到变卦与本卦完全相同，已尝试重新修正")
-        print("\n警告：检测到变卦与本卦完全相同，已尝试重新修正！")
-        for i in range(len(changed_hexagram)):
-            if original_hexagram[i] == 3:
-                changed_hexagram[i] = 2
-                break
-            elif original_hexagram[i] == 4:
-                changed_hexagram[i] = 1
-                break
+    # 5. 标记动爻；入墓、回头生克与日期无关，每种起卦只算一次
+    moving_indices = MOVING_INDICES[moving_mask]
+    is_moving_original = [bool(moving_mask >> i & 1) for i in range(6)]
+    original_flags, changed_flags = _cast_flags(original_index, moving_mask)
 
-    # 重新获取变卦信息
-    changed_info = guagong.get_hexagram_palace(changed_hexagram) if (has_moving and changed_hexagram) else None
-    changed_type = changed_info["宫名"] if (has_moving and changed_info) else None
-    changed_hex_name = changed_info["卦名"] if (has_moving and changed_info) else None
-    changed_branch = HEXAGRAM_EARTHLY_BRANCH[changed_type] if (has_moving and changed_type) else None
-
-    # 5. 世应爻
-    shi_yao_idx = original_info["世爻索引"]
-    shi_yao_branch = original_branch[shi_yao_idx]
-    shi_yao_wuxing = BRANCH_WUXING[shi_yao_branch]
-    ying_yao_idx = original_info["应爻索引"]
-    ying_yao_branch = original_branch[ying_yao_idx]
-
-    changed_shi_yao_idx = changed_info["世爻索引"] if (has_moving and changed_info) else None
-    changed_shi_yao_branch = changed_branch[changed_shi_yao_idx] if (
-            has_moving and changed_branch and changed_shi_yao_idx is not None) else None
-    changed_shi_yao_wuxing = BRANCH_WUXING[changed_shi_yao_branch] if (has_moving and changed_shi_yao_branch) else None
-
-    # 标记动爻
-    is_moving_original = [line in [3, 4] for line in original_hexagram]
-    moving_indices = [i for i, is_moving in enumerate(is_moving_original) if is_moving]
-
-    # 6. 计算旺衰
-    original_strength = wangshuai.batch_calculate_strength(
+    # 6. 计算旺衰（随日、月变化的部分）
+    original_strength = wangshuai.batch_yao_strength(
         yao_branches=original_branch,
         month_branch=month_branch,
         day_branch=day_branch,
         changed_branches=changed_branch,
         is_moving_yaos=is_moving_original
     )
+    original_rows = _build_rows(original_hexagram, original_static, original_strength, original_flags, liushou_order)
 
-    original_strength = check_additional_tomb(
-        original_hexagram=original_hexagram,
-        original_branch=original_branch,
-        changed_branch=changed_branch,
-        strengths=original_strength,
-        is_original=True
-    )
-
-    changed_strength = None
-    if has_moving and changed_hexagram and changed_branch:
-        changed_strength = wangshuai.batch_calculate_strength(
+    changed_rows = None
+    if has_moving:
+        changed_strength = wangshuai.batch_yao_strength(
             yao_branches=changed_branch,
             month_branch=month_branch,
             day_branch=day_branch,
             changed_branches=None
         )
+        changed_rows = _build_rows(changed_hexagram, changed_static, changed_strength, changed_flags, liushou_order)
 
-        changed_strength = check_additional_tomb(
-            original_hexagram=original_hexagram,
-            original_branch=original_branch,
-            changed_branch=changed_branch,
-            strengths=changed_strength,
-            is_original=False
-        )
+    return Chart(
+        time=time,
+        reason=reason,
+        year_branch=year_branch,
+        month_branch=month_branch,
+        day_branch=day_branch,
+        hour_branch=hour_branch,
+        day_stem=day_stem,
+        xunkong=xunkong,
+        pillars=pillars,
+        lunar=lunar,
+        original_hexagram=tuple(original_hexagram),
+        original_info=original_info,
+        original_rows=original_rows,
+        changed_hexagram=tuple(changed_hexagram) if changed_hexagram else None,
+        changed_info=changed_info,
+        changed_rows=changed_rows,
+        moving_lines=tuple(i + 1 for i in moving_indices)
+    )
 
-        changed_strength = check_huitou(
-            original_branch=original_branch,
-            changed_branch=changed_branch,
-            moving_indices=moving_indices,
-            changed_strength=changed_strength
-        )
 
-    # 7. 输出头部信息
-    header_line1 = "\n" + "=" * 140
-    full_txt.append(header_line1)
-    ai_txt.append(header_line1)
-    print(header_line1)
-
-    header_line2 = f"排盘时间：{time.year}年{time.month}月{time.day}日 {time.hour}:{time.minute}"
-    full_txt.append(header_line2)
-    ai_txt.append(header_line2)
-    print(header_line2)
-
-    header_line2_5 = f"起卦原因：{reason}"
-    ai_txt.append(header_line2_5)
-    full_txt.append(header_line2_5)
-    print(header_line2_5)
-
-    header_line3 = f"地支：年{year_branch} 月{month_branch} 日{day_branch} 时{hour_branch}"
-    full_txt.append(header_line3)
-    ai_txt.append(header_line3)
-    print(header_line3)
-
-    header_line4 = f"旬空：{xunkong[0]}{xunkong[1]}空"
-    full_txt.append(header_line4)
-    ai_txt.append(header_line4)
-    print(header_line4)
-
-    header_line5 = f"本卦：{original_type}{original_info['卦类型']}（{original_hex_name}）  世爻：{positions[shi_yao_idx]}({shi_yao_branch})  应爻：{positions[ying_yao_idx]}({ying_yao_branch})"
-    full_txt.append(header_line5)
-    ai_txt.append(header_line5)
-    print(header_line5)
-
-    if has_moving and changed_type and changed_hex_name:
-        header_line6 = f"变卦：{changed_type}{changed_info['卦类型']}（{changed_hex_name}）  世爻：{positions[changed_shi_yao_idx]}({changed_shi_yao_branch})" if changed_shi_yao_idx is not None else f"变卦：{changed_type}{changed_info['卦类型']}（{changed_hex_name}）"
-        full_txt.append(header_line6)
-        ai_txt.append(header_line6)
-        print(header_line6)
-
-    header_line7 = "=" * 140
-    ai_txt.append(header_line7)
-    full_txt.append(header_line7)
-    print(header_line7)
-
-    # 8. 输出本卦（从上爻到初爻）
-    bengua_title = "\n【本卦】"
-    full_txt.append(bengua_title)
-    ai_txt.append(bengua_title)
-    print(bengua_title)
-
-    # 打印表头
-    header = "六兽       六亲        爻位      世应（+为世）卦象         地支(五行)          类型           旺衰得分            状态"
-    full_txt.append(header)
-    ai_txt.append(header)
-    print(header)
-    full_txt.append("-" * 140)
-    ai_txt.append("-" * 140)
-    print("-" * 140)
-
-    # 从上爻(5)到初爻(0)输出
+# ---------------------- 排盘结果渲染 ----------------------
+def _render_rows(rows, show_moving):
+    """渲染六爻表格（从上爻到初爻）"""
+    lines = [TABLE_HEADER, "-" * 140]
+    spacing = "\u200A"  # 卦象前的细空格
     for i in range(5, -1, -1):
-        line_value = original_hexagram[i]
-        beast = liushou_order[i]
-        branch = original_branch[i]
-        wuxing = BRANCH_WUXING[branch]
-        liqin = get_liqin(shi_yao_wuxing, wuxing)
-        strength = original_strength[i]
-
-        # 世应标识和间距
-        if i == shi_yao_idx:
-            shiying = " + "
-            spacing = "\u200A"
-        elif i == ying_yao_idx:
-            shiying = " * "
-            spacing = "\u200A"
-        else:
-            shiying = "---"
-            spacing = "\u200A"
-
-        status_text = "、".join(strength["status"]) if strength["status"] else "无"
-        guaxiang = f"{spacing}{line_symbols[line_value]}{moving_marks[line_value]}"
-
-        yao_line = "{0:8} {1:8} {2:8} {3:8} {4:15} {5:15} {6:12} 旺衰得分：{7:<6} 状态：{8}".format(
-            beast, liqin, positions[i], shiying, guaxiang,
-            f"{branch}({wuxing})", line_names[line_value],
-            str(strength['score']), status_text
-        )
-        full_txt.append(yao_line)
-        ai_txt.append(yao_line)
-        print(yao_line)
-
-    # 9. 输出变卦（从上爻到初爻）
-    if has_moving and changed_hexagram and changed_strength:
-        biangua_title = "\n【变卦】"
-        full_txt.append(biangua_title)
-        ai_txt.append(biangua_title)
-        print(biangua_title)
-
-        full_txt.append(header)
-        ai_txt.append(header)
-        print(header)
-        full_txt.append("-" * 140)
-        ai_txt.append("-" * 140)
-        print("-" * 140)
-
-        # 从上爻(5)到初爻(0)输出
-        for i in range(5, -1, -1):
-            line_value = changed_hexagram[i]
-            beast = liushou_order[i]
-            branch = changed_branch[i]
-            wuxing = BRANCH_WUXING[branch]
-            liqin = get_liqin(changed_shi_yao_wuxing, wuxing) if changed_shi_yao_wuxing else ""
-            strength = changed_strength[i]
-
-            # 世应标识和间距
-            if changed_shi_yao_idx is not None and i == changed_shi_yao_idx:
-                shiying = " + "
-                spacing = "\u200A"
-            elif changed_shi_yao_idx is not None and i == (changed_shi_yao_idx + 3) % 6:
-                shiying = " * "
-                spacing = "\u200A"
-            else:
-                shiying = "---"
-                spacing = "\u200A"
-
-            status_text = "、".join(strength["status"]) if strength["status"] else "无"
-            guaxiang = f"{spacing}{line_symbols[line_value]}   "
-
-            yao_line = "{0:8} {1:8} {2:8} {3:8} {4:15} {5:15} {6:12} 旺衰得分：{7:<6} 状态：{8}".format(
-                beast, liqin, positions[i], shiying, guaxiang,
-                f"{branch}({wuxing})", line_names[line_value],
-                str(strength['score']), status_text
-            )
-            full_txt.append(yao_line)
-            ai_txt.append(yao_line)
-            print(yao_line)
-
-    # 10. 动爻汇总
-    moving_lines = [i + 1 for i, line in enumerate(original_hexagram) if line in [3, 4]]
-    if moving_lines:
-        moving_line = f"\n动爻汇总：{', '.join(map(str, moving_lines))}爻"
+        row = rows[i]
+        status_text = "、".join(row.status) if row.status else "无"
+        mark = MOVING_MARKS[row.line] if show_moving else "   "
+        guaxiang = f"{spacing}{LINE_SYMBOLS[row.line]}{mark}"
+        liqin = jichu.RELATIVE_NAMES[row.relative] if row.relative is not None else ""
+        wuxing = jichu.ELEMENT_NAMES[jichu.BRANCH_ELEMENT[row.branch]]
+
+        lines.append("{0:8} {1:8} {2:8} {3:8} {4:15} {5:15} {6:12} 旺衰得分：{7:<6} 状态：{8}".format(
+            row.beast, liqin, POSITIONS[i], row.shi_ying, guaxiang,
+            f"{jichu.BRANCH_NAMES[row.branch]}({wuxing})", LINE_NAMES[row.line],
+            str(row.score), status_text
+        ))
+    return lines
+
+
+def _render_chart_lines(chart):
+    """渲染排盘主体（头部信息、本卦、变卦、动爻汇总），完整文本与AI提问文本共用"""
+    branch_names = jichu.BRANCH_NAMES
+    time = chart.time
+    lines = ["\n" + "=" * 140]
+
+    # 头部信息
+    lines.append(f"{huancun.TIME_LABEL}{time.year}年{time.month}月{time.day}日 {time.hour}:{time.minute}")
+    if chart.lunar:
+        lines.append(f"农历：{nongli.format_lunar(chart.lunar)}")
+    lines.append(f"起卦原因：{chart.reason}")
+    lines.append(f"地支：年{branch_names[chart.year_branch]} 月{branch_names[chart.month_branch]} "
+                 f"日{branch_names[chart.day_branch]} 时{branch_names[chart.hour_branch]}")
+    lines.append("旬空：{0}{1}空".format(*(branch_names[b] if b is not None else "" for b in chart.xunkong)))
+
+    info = chart.original_info
+    shi_yao_idx = info.shi
+    ying_yao_idx = info.ying
+    lines.append(f"本卦：{info.palace_name}{info.type}（{info.name}）  "
+                 f"世爻：{POSITIONS[shi_yao_idx]}({branch_names[chart.original_rows[shi_yao_idx].branch]})  "
+                 f"应爻：{POSITIONS[ying_yao_idx]}({branch_names[chart.original_rows[ying_yao_idx].branch]})")
+
+    changed_info = chart.changed_info
+    if changed_info:
+        changed_shi_yao_idx = changed_info.shi
+        changed_shi_yao_branch = PALACE_NAJIA[changed_info.palace][changed_shi_yao_idx]
+        lines.append(f"变卦：{changed_info.palace_name}{changed_info.type}（{changed_info.name}）  "
+                     f"世爻：{POSITIONS[changed_shi_yao_idx]}({branch_names[changed_shi_yao_branch]})")
+    lines.append("=" * 140)
+
+    # 本卦（从上爻到初爻）
+    lines.append("\n【本卦】")
+    lines.extend(_render_rows(chart.original_rows, show_moving=True))
+
+    # 变卦（从上爻到初爻）
+    if chart.changed_rows:
+        lines.append("\n【变卦】")
+        lines.extend(_render_rows(chart.changed_rows, show_moving=False))
+
+    # 动爻汇总
+    if chart.moving_lines:
+        lines.append(f"\n动爻汇总：{', '.join(map(str, chart.moving_lines))}爻")
     else:
-        moving_line = "\n无动爻（纯净卦）"
-    full_txt.append(moving_line)
-    ai_txt.append(moving_line)
-    print(moving_line)
+        lines.append("\n无动爻（纯净卦）")
+    return lines
 
-    # 11. 卦辞爻辞
-    guaci_line = "\n" + "=" * 140
-    full_txt.append(guaci_line)
-    print(guaci_line)
 
-    guamin_text = data.get_hexagram_texts(original_hex_name)
-    guaming_line = '\n本卦卦名：' + original_hex_name
-    full_txt.append(guaming_line)
-    print(guaming_line)
+def render_ai_text(chart):
+    """渲染向AI提问的排盘文本（省略卦辞爻辞与备忘信息，以便节省tokens）"""
+    return '\n'.join(_render_chart_lines(chart))
 
-    guaci_line = "卦辞：" + guamin_text["卦辞"]
-    full_txt.append(guaci_line)
-    print(guaci_line)
 
+def render_chart_text(chart):
+    """渲染完整排盘文本（含卦辞爻辞与备忘信息）"""
+    lines = _render_chart_lines(chart)
+
+    # 卦辞爻辞
+    hex_name = chart.original_info.name
+    guamin_text = data.get_hexagram_texts_by_index(chart.original_info.index)
+    lines.append("\n" + "=" * 140)
+    lines.append('\n本卦卦名：' + hex_name)
+    lines.append("卦辞：" + guamin_text["卦辞"])
     for i in range(6):
-        yaoci_line = guamin_text["爻辞"][i]
-        full_txt.append(yaoci_line)
-        print(yaoci_line)
+        lines.append(guamin_text["爻辞"][i])
+
+    # 备忘信息
+    lines.append(MEMO_TEXT)
+    lines.append("\n旺衰得分仅作最基础参考")
+    return '\n'.join(lines)
+
+
+def _rows_to_dicts(rows):
+    return [{
+        "position": POSITIONS[i],
+        "line": row.line,
+        "beast": row.beast,
+        "relative": jichu.RELATIVE_NAMES[row.relative] if row.relative is not None else "",
+        "branch": jichu.BRANCH_NAMES[row.branch],
+        "element": jichu.ELEMENT_NAMES[jichu.BRANCH_ELEMENT[row.branch]],
+        "shi_ying": row.shi_ying.strip("- "),
+        "score": row.score,
+        "status": list(row.status),
+        "flags": row.flags
+    } for i, row in enumerate(rows)]
+
+
+def render_chart_dict(chart):
+    """渲染为可直接JSON序列化的字典（批量导出用，爻按初爻到上爻排列）"""
+    branch_names = jichu.BRANCH_NAMES
+    result = {
+        "time": chart.time.isoformat(timespec="minutes"),
+        "reason": chart.reason,
+        "pillars": {
+            "year": branch_names[chart.year_branch],
+            "month": branch_names[chart.month_branch],
+            "day": branch_names[chart.day_branch],
+            "hour": branch_names[chart.hour_branch]
+        },
+        "ganzhi": dict(zip(("year", "month", "day", "hour"), (sizhu.JIAZI_NAMES[n] for n in chart.pillars[:4]))),
+        "lunar": dict(chart.lunar._asdict(), text=nongli.format_lunar(chart.lunar)) if chart.lunar else None,
+        "day_stem": jichu.STEM_NAMES[chart.day_stem],
+        "xunkong": [branch_names[b] if b is not None else "" for b in chart.xunkong],
+        "original": {
+            "hexagram": list(chart.original_hexagram),
+            "name": chart.original_info.name,
+            "palace": chart.original_info.palace_name,
+            "type": chart.original_info.type,
+            "lines": _rows_to_dicts(chart.original_rows)
+        },
+        "changed": None,
+        "moving_lines": list(chart.moving_lines)
+    }
+    if chart.changed_rows:
+        result["changed"] = {
+            "hexagram": list(chart.changed_hexagram),
+            "name": chart.changed_info.name,
+            "palace": chart.changed_info.palace_name,
+            "type": chart.changed_info.type,
+            "lines": _rows_to_dicts(chart.changed_rows)
+        }
+    return result
 
-    #  备忘打印
-    name_beiwang = """\n============================================================================================================================================
-\n地支相合：子丑合土局（水）; 寅亥合木局;卯戌合火局; 辰酉合金局; 巳申合水局; 午未合土局
-地支相冲：子午；丑未；寅申；卯酉；辰戌；巳亥
-木长生在亥，旺在卯，墓在未，绝于申；
-金长生在巳，旺在酉，墓在丑，绝于寅；
-火长生在寅，旺在午，墓在戌，绝于亥；
-水长生在申，旺在子，墓在辰，绝于巳；
-土随火行：长生在寅，绝于亥；墓于四墓库，旺于四墓库
 
-    季节    旺  相  休  囚  死
-    春季    木  火  水  金  土
-    夏季    火  土  木  水  金
-    秋季    金  水  土  火  木
-    冬季    水  木  金  土  火
-    季末    土  金  火  木  水 """
-    full_txt.append(name_beiwang)
-    print(name_beiwang)
+# 排盘结果及两份文本（完整排盘文本、AI提问文本）
+ArrangeResult = namedtuple("ArrangeResult", ["chart", "text", "ai_text"])
+
+
+def arrange(original_hexagram, time, reason, sink=None):
+    """
+    排盘并输出完整结果，返回ArrangeResult(chart, text, ai_text)
+    不读写任何模块级可变状态，可在多线程中并发调用
+    :param sink: 输出目标（见shuchu模块），默认使用进程默认输出目标（标准输出）
+    """
+    chart = compute_chart(original_hexagram, time, reason)
+    full_text = render_chart_text(chart)
+    shuchu.resolve_sink(sink).write(full_text + "\n")
+    return ArrangeResult(chart, full_text, render_ai_text(chart))
+
+
+ai_text = ""  #初始化全局变量ai_text（仅供旧接口arrange_hexagram使用）
 
-    shenmin = "\n旺衰得分仅作最基础参考"
-    full_txt.append(shenmin)
-    print(shenmin)
+
+def arrange_hexagram(original_hexagram, time, reason, sink=None):
+    """
+    旧接口：排盘并输出完整结果，返回完整排盘文本（AI提问文本存入全局变量ai_text）
+    全局变量在并发调用时会互相覆盖，新代码请使用arrange()
+    """
+    result = arrange(original_hexagram, time, reason, sink=sink)
 
     global ai_text
-    ai_text = '\n'.join(ai_txt)  # 合并为完整字符串（ai提问文档）
-    full_text = '\n'.join(full_txt)  # 合并为完整字符串并返回
-    return full_text
+    ai_text = result.ai_text  # ai提问文档
+    return result.text
 
 # ---------------------- AI解析模块 ----------------------
 def ai_word(ask):
@@ -547,7 +566,9 @@ def ai_word(ask):
             api_key=api_key,
             prompt=ask,
             max_tokens=1500,
-            stream=True
+            stream=True,
+            sink=shuchu.NULL_SINK,  # 下方已实时打印，不再重复回显
+            cache=huancun.get_default_cache()  # 同一排盘再次解析时直接读取缓存
         )
 
         # 先判断返回是否为字符串（完整响应）
@@ -559,6 +580,8 @@ def ai_word(ask):
         # 流式输出处理（如果是迭代器）
         full_content = []
         for chunk in response:
+            if chunk is None:  # 流式结束标识
+                break
             # 检查chunk是否为字典类型
             if not isinstance(chunk, dict):
                 # 直接输出非字典类型的内容（如字符串）
@@ -582,13 +605,23 @@ def ai_word(ask):
 
 # ------------------- 主程序入口 -------------------
 if __name__ == "__main__":
+    # 检索卦辞爻辞：python main.py --search 利见大人
+    if len(sys.argv) > 1 and sys.argv[1] == "--search":
+        import sousuo
+        sys.exit(sousuo.cli_main(sys.argv[2:]))
+
+    # 带参数运行时进入非交互批量模式，如：python main.py --batch casts.jsonl（详见python main.py --help）
+    if len(sys.argv) > 1:
+        import piliang
+        sys.exit(piliang.cli_main(sys.argv[1:]))
+
     original_hexagram, time, reason = get_user_input()
-    arrange_hexagram(original_hexagram, time, reason)
+    result = arrange(original_hexagram, time, reason)
     # 询问用户是否使用AI解析
     use_ai = input("\n是否使用AI解析排盘结果？(y/n)：").strip().lower()
     if use_ai in ['y', 'yes']:
         # 构造AI询问内容
-        prompt = f"请对以下六爻排盘信息进行解析：\n{ai_text}"  # 填写向ai提问的内容(存储在ai_text)
+        prompt = f"请对以下六爻排盘信息进行解析：\n{tishi.render_prompt(result.chart)}"  # 紧凑排盘文本，比result.ai_text节省tokens
         ai_word(prompt)
     else:
         print("\n程序结束，未使用AI解析功能。")
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""
+nongli模块：公历转农历（1900—2100年）
+LUNAR_INFO为通行的逐年压缩编码，每年一个整数：
+    低4位：闰月月份（0为无闰月）
+    第15位至第4位：正月至十二月的大小（1为大月30天，0为小月29天）
+    第16位：闰月大小（1为30天）
+导入时展开为各年正月初一的日序号与年内各月初一的偏移；换算时按平均年长估出年份后至多微调一次，
+再在本年至多13个月中查找，单次换算为常数时间。日序号与dizhi一致（距1900年1月1日的天数），排盘时直接复用四柱的day_index
+"""
+
+import bisect
+from collections import namedtuple
+import jichu  # 基础编码模块
+import sizhu  # 四柱干支模块
+import dizhi  # 时间地支转换模块
+
+np = jichu.np  # 未安装numpy时为None，数组批量接口不可用
+
+# ---------------------- 农历年表 ----------------------
+LUNAR_INFO = (
+    0x04bd8, 0x04ae0, 0x0a570, 0x054d5, 0x0d260, 0x0d950, 0x16554, 0x056a0, 0x09ad0, 0x055d2,  # 1900-1909
+    0x04ae0, 0x0a5b6, 0x0a4d0, 0x0d250, 0x1d255, 0x0b540, 0x0d6a0, 0x0ada2, 0x095b0, 0x14977,  # 1910-1919
+    0x04970, 0x0a4b0, 0x0b4b5, 0x06a50, 0x06d40, 0x1ab54, 0x02b60, 0x09570, 0x052f2, 0x04970,  # 1920-1929
+    0x06566, 0x0d4a0, 0x0ea50, 0x16a95, 0x05ad0, 0x02b60, 0x186e3, 0x092e0, 0x1c8d7, 0x0c950,  # 1930-1939
+    0x0d4a0, 0x1d8a6, 0x0b550, 0x056a0, 0x1a5b4, 0x025d0, 0x092d0, 0x0d2b2, 0x0a950, 0x0b557,  # 1940-1949
+    0x06ca0, 0x0b550, 0x15355, 0x04da0, 0x0a5b0, 0x14573, 0x052b0, 0x0a9a8, 0x0e950, 0x06aa0,  # 1950-1959
+    0x0aea6, 0x0ab50, 0x04b60, 0x0aae4, 0x0a570, 0x05260, 0x0f263, 0x0d950, 0x05b57, 0x056a0,  # 1960-1969
+    0x096d0, 0x04dd5, 0x04ad0, 0x0a4d0, 0x0d4d4, 0x0d250, 0x0d558, 0x0b540, 0x0b6a0, 0x195a6,  # 1970-1979
+    0x095b0, 0x049b0, 0x0a974, 0x0a4b0, 0x0b27a, 0x06a50, 0x06d40, 0x0af46, 0x0ab60, 0x09570,  # 1980-1989
+    0x04af5, 0x04970, 0x064b0, 0x074a3, 0x0ea50, 0x06b58, 0x05ac0, 0x0ab60, 0x096d5, 0x092e0,  # 1990-1999
+    0x0c960, 0x0d954, 0x0d4a0, 0x0da50, 0x07552, 0x056a0, 0x0abb7, 0x025d0, 0x092d0, 0x0cab5,  # 2000-2009
+    0x0a950, 0x0b4a0, 0x0baa4, 0x0ad50, 0x055d9, 0x04ba0, 0x0a5b0, 0x15176, 0x052b0, 0x0a930,  # 2010-2019
+    0x07954, 0x06aa0, 0x0ad50, 0x05b52, 0x04b60, 0x0a6e6, 0x0a4e0, 0x0d260, 0x0ea65, 0x0d530,  # 2020-2029
+    0x05aa0, 0x076a3, 0x096d0, 0x04afb, 0x04ad0, 0x0a4d0, 0x1d0b6, 0x0d250, 0x0d520, 0x0dd45,  # 2030-2039
+    0x0b5a0, 0x056d0, 0x055b2, 0x049b0, 0x0a577, 0x0a4b0, 0x0aa50, 0x1b255, 0x06d20, 0x0ada0,  # 2040-2049
+    0x14b63, 0x09370, 0x049f8, 0x04970, 0x064b0, 0x168a6, 0x0ea50, 0x06b20, 0x1a6c4, 0x0aae0,  # 2050-2059
+    0x092e0, 0x0d2e3, 0x0c960, 0x0d557, 0x0d4a0, 0x0da50, 0x05d55, 0x056a0, 0x0a6d0, 0x055d4,  # 2060-2069
+    0x052d0, 0x0a9b8, 0x0a950, 0x0b4a0, 0x0b6a6, 0x0ad50, 0x055a0, 0x0aba4, 0x0a5b0, 0x052b0,  # 2070-2079
+    0x0b273, 0x06930, 0x07337, 0x06aa0, 0x0ad50, 0x14b55, 0x04b60, 0x0a570, 0x054e4, 0x0d160,  # 2080-2089
+    0x0e968, 0x0d520, 0x0daa0, 0x16aa6, 0x056d0, 0x04ae0, 0x0a9d4, 0x0a2d0, 0x0d150, 0x0f252,  # 2090-2099
+    0x0d520  # 2100
+)
+FIRST_YEAR = 1900
+LAST_YEAR = FIRST_YEAR + len(LUNAR_INFO) - 1
+FIRST_NEW_YEAR_INDEX = 30  # 1900年正月初一为公历1900年1月31日
+
+MONTH_NAMES = ("正月", "二月", "三月", "四月", "五月", "六月", "七月", "八月", "九月", "十月", "冬月", "腊月")
+DAY_NAMES = (
+    "初一", "初二", "初三", "初四", "初五", "初六", "初七", "初八", "初九", "初十",
+    "十一", "十二", "十三", "十四", "十五", "十六", "十七", "十八", "十九", "二十",
+    "廿一", "廿二", "廿三", "廿四", "廿五", "廿六", "廿七", "廿八", "廿九", "三十"
+)
+
+# 农历日期：year为农历年（正月初一换年），leap为是否闰月
+LunarDate = namedtuple("LunarDate", ["year", "month", "day", "leap"])
+
+
+def year_months(info):
+    """按顺序返回一年各月的(月份, 是否闰月, 天数)"""
+    leap_month = info & 0xF
+    months = []
+    for month in range(1, 13):
+        months.append((month, False, 30 if info & (0x10000 >> month) else 29))
+        if month == leap_month:
+            months.append((month, True, 30 if info & 0x10000 else 29))
+    return months
+
+
+def _build_tables():
+    year_starts = []  # 各年正月初一的日序号，末尾多一项为表外第一天
+    month_offsets = []  # 各年每月初一相对正月初一的天数
+    month_keys = []  # 各年每月的(月份, 是否闰月)
+    start = FIRST_NEW_YEAR_INDEX
+    for info in LUNAR_INFO:
+        year_starts.append(start)
+        offsets, keys, offset = [], [], 0
+        for month, leap, days in year_months(info):
+            offsets.append(offset)
+            keys.append((month, leap))
+            offset += days
+        month_offsets.append(tuple(offsets))
+        month_keys.append(tuple(keys))
+        start += offset
+    year_starts.append(start)
+    return tuple(year_starts), tuple(month_offsets), tuple(month_keys)
+
+
+YEAR_STARTS, _MONTH_OFFSETS, _MONTH_KEYS = _build_tables()
+_DAYS_PER_YEAR = (YEAR_STARTS[-1] - YEAR_STARTS[0]) / len(LUNAR_INFO)
+
+
+# ---------------------- 换算 ----------------------
+def from_day_index(day_index):
+    """日序号（距1900年1月1日的天数）转农历，超出1900—2100年农历范围时返回None"""
+    if not YEAR_STARTS[0] <= day_index < YEAR_STARTS[-1]:
+        return None
+    i = min(int((day_index - YEAR_STARTS[0]) / _DAYS_PER_YEAR), len(LUNAR_INFO) - 1)
+    if day_index < YEAR_STARTS[i]:
+        i -= 1
+    elif day_index >= YEAR_STARTS[i + 1]:
+        i += 1
+    offset = day_index - YEAR_STARTS[i]
+    k = bisect.bisect_right(_MONTH_OFFSETS[i], offset) - 1
+    month, leap = _MONTH_KEYS[i][k]
+    return LunarDate(FIRST_YEAR + i, month, offset - _MONTH_OFFSETS[i][k] + 1, leap)
+
+
+def from_date(year, month, day):
+    """公历日期转农历"""
+    return from_day_index(dizhi.LunarToEarthlyBranch.get_day_index(year, month, day))
+
+
+def format_lunar(lunar):
+    """农历日期转为文字，如“乙巳年闰六月初一”；lunar为None时返回空字符串"""
+    if lunar is None:
+        return ""
+    year_name = sizhu.JIAZI_NAMES[(lunar.year - sizhu.YEAR_CYCLE_BASE) % 60]
+    leap = "闰" if lunar.leap else ""
+    return f"{year_name}年{leap}{MONTH_NAMES[lunar.month - 1]}{DAY_NAMES[lunar.day - 1]}"
+
+
+# ---------------------- 数组批量换算 ----------------------
+LunarArrays = namedtuple("LunarArrays", ["year", "month", "day", "leap"])
+_DAY_TABLE = None  # 按日展开的(农历年, 月, 日, 是否闰月)数组，首次批量换算时构建
+
+
+def _get_day_table():
+    global _DAY_TABLE
+    if _DAY_TABLE is None:
+        years, months, leaps, lengths = [], [], [], []
+        for i, info in enumerate(LUNAR_INFO):
+            for month, leap, days in year_months(info):
+                years.append(FIRST_YEAR + i)
+                months.append(month)
+                leaps.append(leap)
+                lengths.append(days)
+        lengths = np.array(lengths)
+        month_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        day = np.arange(lengths.sum()) - np.repeat(month_starts, lengths) + 1
+        _DAY_TABLE = (
+            np.repeat(np.array(years, dtype=np.int16), lengths),
+            np.repeat(np.array(months, dtype=np.int8), lengths),
+            day.astype(np.int8),
+            np.repeat(np.array(leaps, dtype=bool), lengths)
+        )
+    return _DAY_TABLE
+
+
+def batch_from_day_index(day_index):
+    """
+    日序号数组批量转农历，逐项与from_day_index一致
+    :return: LunarArrays(year, month, day, leap)，超出范围的项年、月、日均为0
+    """
+    jichu.require_numpy()
+    offset = np.asarray(day_index, dtype=np.int64) - YEAR_STARTS[0]
+    valid = (offset >= 0) & (offset < YEAR_STARTS[-1] - YEAR_STARTS[0])
+    columns = [np.take(column, offset, mode="clip") for column in _get_day_table()]
+    if not valid.all():
+        for column in columns:
+            column[~valid] = 0
+    return LunarArrays(*columns)
+
+
+def batch_lunar(times, unit="s"):
+    """datetime64数组或整数时间戳数组（参数同dizhi.batch_branch_indexes）批量转农历"""
+    days = dizhi.to_minutes_array(times, unit) // 1440 + dizhi._DAYS_BEFORE_EPOCH
+    return batch_from_day_index(days)
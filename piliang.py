@@ -0,0 +1,248 @@
+"""
+piliang模块：批量排盘
+arrange_many()流式读取起卦记录，按块分发到进程池并行排盘，同时在途的块数有上限，内存占用不随输入规模增长
+cli_main()为非交互批量命令行（python main.py --batch），逐行读入JSONL/CSV，逐条输出结构化结果
+"""
+
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import main  # 排盘主模块
+import shuchu  # 输出目标模块
+import wangshuai  # 旺衰判断模块
+
+
+def _init_worker():
+    """工作进程初始化：预先构建查找表，关闭终端输出"""
+    shuchu.set_default_sink(shuchu.NULL_SINK)
+    wangshuai.get_strength_table()
+
+
+def _arrange_one(cast, texts):
+    """排盘单条记录，出错时返回{"error": 错误信息}，不影响同块其他记录"""
+    original_hexagram, time, reason = cast
+    try:
+        chart = main.compute_chart(list(original_hexagram), time, reason)
+        if not texts:
+            return main.ArrangeResult(chart, None, None)
+        return main.ArrangeResult(chart, main.render_chart_text(chart), main.render_ai_text(chart))
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}", "cast": cast}
+
+
+def _arrange_chunk(chunk, texts):
+    return [_arrange_one(cast, texts) for cast in chunk]
+
+
+def _chunks(iterable, chunksize):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def arrange_many(iterable, workers=None, chunksize=256, ordered=True, texts=True, max_inflight=None):
+    """
+    批量排盘（生成器）
+    :param iterable: 起卦记录序列，每条为(original_hexagram, time, reason)，可以是任意迭代器
+    :param workers: 进程数，默认CPU核数；为0或1时在当前进程内顺序计算
+    :param chunksize: 每块记录数
+    :param ordered: True按输入顺序返回结果，False按完成顺序返回
+    :param texts: 是否渲染完整排盘文本与AI提问文本（False时ArrangeResult.text/ai_text为None）
+    :param max_inflight: 同时在途的块数上限，默认workers * 2
+    :return: 逐条产出ArrangeResult，出错的记录产出{"error": 错误信息, "cast": 原记录}
+    """
+    chunks = _chunks(iterable, chunksize)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        wangshuai.get_strength_table()  # 只预建查找表；当前进程的默认输出目标保持不变（渲染文本本就不输出）
+        for chunk in chunks:
+            yield from _arrange_chunk(chunk, texts)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        max_inflight = max_inflight or workers * 2
+        pending = deque() if ordered else set()
+
+        for chunk in chunks:
+            if len(pending) >= max_inflight:
+                if ordered:
+                    yield from pending.popleft().result()
+                else:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            future = executor.submit(_arrange_chunk, chunk, texts)
+            if ordered:
+                pending.append(future)
+            else:
+                pending.add(future)
+
+        if ordered:
+            while pending:
+                yield from pending.popleft().result()
+        else:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+
+# ---------------------- 批量命令行 ----------------------
+CSV_FIELDS = ["time", "reason", "lunar", "year", "month", "day", "hour", "day_stem", "xunkong",
+              "original", "original_palace", "changed", "changed_palace", "moving_lines", "scores", "changed_scores"]
+
+
+def parse_hexagram(value):
+    """解析卦象编码：支持"123443"、"1 2 3 4 4 3"、"1,2,3,4,4,3"或整数列表"""
+    if isinstance(value, str):
+        value = [char for char in value if not char.isspace() and char != ","]
+    hexagram = [int(num) for num in value]
+    if len(hexagram) != 6 or any(num not in [1, 2, 3, 4] for num in hexagram):
+        raise ValueError(f"卦象须为6个1-4的数字：{value}")
+    return hexagram
+
+
+def parse_cast(line):
+    """
+    解析一行起卦记录，返回(original_hexagram, time, reason)
+    JSONL：{"hexagram": "123443", "time": "2025-09-06T16:34", "reason": "求财运"}
+    CSV：123443,2025-09-06T16:34,求财运
+    """
+    if line.lstrip().startswith("{"):
+        record = json.loads(line)
+        hexagram, time, reason = record["hexagram"], record["time"], record.get("reason", "")
+    else:
+        fields = next(csv.reader([line]))
+        if len(fields) < 2:
+            raise ValueError("CSV记录至少需要卦象和时间两列")
+        hexagram, time = fields[0], fields[1]
+        reason = fields[2] if len(fields) > 2 else ""
+    return parse_hexagram(hexagram), datetime.datetime.fromisoformat(time.strip()), reason
+
+
+def read_casts(lines, errors=sys.stderr):
+    """逐行解析起卦记录（生成器），空行和CSV表头跳过，无法解析的行报告到errors后跳过"""
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.lower().startswith("hexagram"):
+            continue
+        try:
+            yield parse_cast(line)
+        except (ValueError, KeyError, TypeError) as e:
+            errors.write(f"第{line_no}行解析失败：{e}\n")
+
+
+def chart_flags(chart):
+    """整张盘本卦、变卦各爻状态位的并集，配合wangshuai.status_mask()按状态筛选"""
+    flags = 0
+    for row in chart.original_rows + (chart.changed_rows or ()):
+        flags |= row.flags
+    return flags
+
+
+def _cast_to_dict(cast):
+    original_hexagram, time, reason = cast
+    return {"hexagram": list(original_hexagram), "time": time.isoformat(timespec="minutes"), "reason": reason}
+
+
+def _result_to_record(result, texts):
+    if isinstance(result, dict):
+        return {"error": result["error"], "cast": _cast_to_dict(result["cast"])}
+    record = main.render_chart_dict(result.chart)
+    if texts:
+        record["text"] = result.text
+        record["ai_text"] = result.ai_text
+    return record
+
+
+def _record_to_row(record):
+    if "error" in record:
+        cast = record["cast"]
+        return {"time": cast["time"], "reason": cast["reason"], "original": "".join(map(str, cast["hexagram"])),
+                "error": record["error"]}
+    changed = record["changed"] or {}
+    row = {
+        "time": record["time"],
+        "reason": record["reason"],
+        "lunar": record["lunar"]["text"] if record["lunar"] else "",
+        "year": record["pillars"]["year"],
+        "month": record["pillars"]["month"],
+        "day": record["pillars"]["day"],
+        "hour": record["pillars"]["hour"],
+        "day_stem": record["day_stem"],
+        "xunkong": "".join(record["xunkong"]),
+        "original": record["original"]["name"],
+        "original_palace": record["original"]["palace"],
+        "changed": changed.get("name", ""),
+        "changed_palace": changed.get("palace", ""),
+        "moving_lines": " ".join(map(str, record["moving_lines"])),
+        "scores": " ".join(str(line["score"]) for line in record["original"]["lines"]),
+        "changed_scores": " ".join(str(line["score"]) for line in changed.get("lines", []))
+    }
+    for key in ("text", "ai_text"):
+        if key in record:
+            row[key] = record[key]
+    return row
+
+
+def cli_main(argv=None):
+    """批量命令行入口，返回进程退出码"""
+    parser = argparse.ArgumentParser(
+        prog="python main.py",
+        description="六爻批量排盘：逐行读入起卦记录（JSONL或CSV：卦象、ISO时间、起卦原因），逐条输出结构化结果"
+    )
+    parser.add_argument("--batch", action="store_true", required=True, help="非交互批量模式")
+    parser.add_argument("input", nargs="?", default="-", help="输入文件，省略或为-时读取标准输入")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="进程数（默认CPU核数，0或1为单进程）")
+    parser.add_argument("--chunksize", type=int, default=256, help="每块记录数（默认256）")
+    parser.add_argument("-f", "--format", choices=["jsonl", "csv"], default="jsonl", help="输出格式（默认jsonl）")
+    parser.add_argument("--texts", action="store_true", help="输出中包含完整排盘文本与AI提问文本")
+    parser.add_argument("--unordered", action="store_true", help="按完成顺序输出（不保持输入顺序）")
+    parser.add_argument("--status", default="", help="只输出含任一指定状态的排盘，逗号分隔（如：月破,暗动,回头克）")
+    args = parser.parse_args(argv)
+
+    status_filter = 0
+    if args.status:
+        try:
+            status_filter = wangshuai.status_mask(*(name.strip() for name in args.status.split(",") if name.strip()))
+        except KeyError as e:
+            parser.error(f"未知状态：{e.args[0]}，可选：{'、'.join(wangshuai.STATUS_NAMES)}")
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout
+    try:
+        results = arrange_many(read_casts(source), workers=args.workers, chunksize=args.chunksize,
+                               ordered=not args.unordered, texts=args.texts)
+        if status_filter:  # 按状态位筛选，出错记录照常输出
+            results = (result for result in results
+                       if isinstance(result, dict) or chart_flags(result.chart) & status_filter)
+        records = (_result_to_record(result, args.texts) for result in results)
+
+        if args.format == "jsonl":
+            for record in records:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            fields = CSV_FIELDS + (["text", "ai_text"] if args.texts else []) + ["error"]
+            writer = csv.DictWriter(out, fieldnames=fields, restval="")
+            writer.writeheader()
+            for record in records:
+                writer.writerow(_record_to_row(record))
+        out.flush()
+    except BrokenPipeError:  # 下游管道提前关闭（如| head）
+        sys.stdout = open(os.devnull, "w")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    return 0
@@ -0,0 +1,109 @@
+"""
+shuchu模块：排盘与AI解析的输出目标（sink）
+调用方可按次（sink参数）或按进程（set_default_sink）选择输出位置：
+NullSink丢弃、BufferSink内存缓冲、FileSink写文件、StdoutSink标准输出、LoggingSink写日志
+各模块整段写入，不逐行输出
+"""
+
+import logging
+import sys
+
+
+class NullSink:
+    """丢弃所有输出（批量计算、图形界面等不需要终端输出的场景）"""
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+class BufferSink:
+    """缓存到内存，通过getvalue()取回"""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, text):
+        self._parts.append(text)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return "".join(self._parts)
+
+    def clear(self):
+        self._parts = []
+
+
+class FileSink:
+    """写入文件（传入路径时以追加模式打开，传入文件对象时直接写入）"""
+
+    def __init__(self, file, encoding="utf-8"):
+        if isinstance(file, str):
+            self._file = open(file, "a", encoding=encoding)
+            self._owns_file = True
+        else:
+            self._file = file
+            self._owns_file = False
+
+    def write(self, text):
+        self._file.write(text)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+
+class StdoutSink:
+    """写入标准输出（命令行默认）"""
+
+    def write(self, text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class LoggingSink:
+    """写入logging日志，每次写入记录为一条日志"""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self._logger = logger or logging.getLogger("liuyao")
+        self._level = level
+
+    def write(self, text):
+        text = text.rstrip("\n")
+        if text:
+            self._logger.log(self._level, text)
+
+    def flush(self):
+        pass
+
+
+NULL_SINK = NullSink()
+_default_sink = StdoutSink()
+
+
+def get_default_sink():
+    """获取进程默认输出目标"""
+    return _default_sink
+
+
+def set_default_sink(sink):
+    """设置进程默认输出目标，返回原输出目标"""
+    global _default_sink
+    previous = _default_sink
+    _default_sink = sink
+    return previous
+
+
+def resolve_sink(sink=None):
+    """sink为None时使用进程默认输出目标"""
+    return _default_sink if sink is None else sink
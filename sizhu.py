@@ -0,0 +1,85 @@
+"""
+sizhu模块：四柱（年、月、日、时干支）与旬空
+六十甲子预先展开成表，干支一律用序号n（0-59）表示：天干编码为n % 10，地支编码为n % 12
+由一个日序号（距1900年1月1日的天数）、时辰地支和干支纪年/月建即可O(1)查出四柱，排盘时每张盘只做一次日期换算
+"""
+
+from collections import namedtuple
+import jichu  # 基础编码模块
+import dizhi  # 时间地支转换模块
+
+# ---------------------- 六十甲子 ----------------------
+JIAZI_STEM = tuple(n % 10 for n in range(60))
+JIAZI_BRANCH = tuple(n % 12 for n in range(60))
+JIAZI_NAMES = tuple(jichu.STEM_NAMES[n % 10] + jichu.BRANCH_NAMES[n % 12] for n in range(60))
+JIAZI_INDEX = {name: n for n, name in enumerate(JIAZI_NAMES)}
+
+# 旬空（按六十甲子序号索引）：第n位所在旬的旬首为 n - n % 10，十天干配完后余下的两个地支为空亡
+XUNKONG = tuple(((n - n % 10 + 10) % 12, (n - n % 10 + 11) % 12) for n in range(60))
+
+YEAR_CYCLE_BASE = 4  # 公元4年为甲子年
+
+
+def jiazi_index(stem, branch):
+    """由天干、地支编码求六十甲子序号（干支须同阴同阳）"""
+    return (6 * stem - 5 * branch) % 60
+
+
+# 五虎遁：年干 -> 寅月天干（甲己丙寅、乙庚戊寅、丙辛庚寅、丁壬壬寅、戊癸甲寅），按[年干 % 5][月支]展开
+_MONTH_CYCLE = tuple(
+    tuple(jiazi_index((stem * 2 + 2 + (branch - jichu.Branch.YIN) % 12) % 10, branch) for branch in range(12))
+    for stem in range(5)
+)
+# 五鼠遁：日干 -> 子时天干（甲己甲子、乙庚丙子、丙辛戊子、丁壬庚子、戊癸壬子），按[日干 % 5][时支]展开
+_HOUR_CYCLE = tuple(
+    tuple(jiazi_index((stem * 2 + branch) % 10, branch) for branch in range(12))
+    for stem in range(5)
+)
+
+# ---------------------- 四柱 ----------------------
+# year、month、day、hour均为六十甲子序号，xunkong为日柱旬空的两个地支编码，day_index为距1900年1月1日的天数
+Pillars = namedtuple("Pillars", ["year", "month", "day", "hour", "xunkong", "day_index"])
+
+
+def day_cycle(day_index):
+    """日序号 -> 日柱六十甲子序号"""
+    return (day_index + dizhi.LunarToEarthlyBranch.BASE_DAY_CYCLE) % 60
+
+
+def pillars_from_index(day_index, hour_branch, year, month_branch, late_zi=False):
+    """
+    由日序号、时辰地支、干支纪年年份和月地支O(1)查出四柱
+    :param day_index: 距1900年1月1日的天数
+    :param hour_branch: 时辰地支编码
+    :param year: 以立春为岁首的年份
+    :param month_branch: 月地支编码（以交节为界）
+    :param late_zi: 是否为23:00-23:59的晚子时（时干按次日日干起五鼠遁，日柱仍为当日）
+    :return: Pillars
+    """
+    year_cycle = (year - YEAR_CYCLE_BASE) % 60
+    day = day_cycle(day_index)
+    hour_day = day_cycle(day_index + 1) if late_zi else day
+    return Pillars(
+        year=year_cycle,
+        month=_MONTH_CYCLE[year_cycle % 5][month_branch],
+        day=day,
+        hour=_HOUR_CYCLE[hour_day % 5][hour_branch],
+        xunkong=XUNKONG[day],
+        day_index=day_index
+    )
+
+
+def get_pillars(time):
+    """
+    计算datetime对应的四柱（立春换年，交节换月，精确到分钟）
+    23点后为子时，时柱按次日日干起（如2025-09-06 23:30为甲子时）；日柱与旬空在零点才换日（晚子时不换日）
+    """
+    year, month_branch = dizhi.LunarToEarthlyBranch.get_ganzhi_year_month(time)
+    day_index = dizhi.LunarToEarthlyBranch.get_day_index(time.year, time.month, time.day)
+    hour_branch = dizhi.LunarToEarthlyBranch.get_hour_branch_index(time.hour)
+    return pillars_from_index(day_index, hour_branch, year, month_branch, late_zi=time.hour >= 23)
+
+
+def format_pillars(pillars):
+    """四柱转为文字，如“乙巳年 甲申月 戊寅日 庚申时”"""
+    return "{0}年 {1}月 {2}日 {3}时".format(*(JIAZI_NAMES[n] for n in pillars[:4]))
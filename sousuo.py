@@ -0,0 +1,136 @@
+"""
+sousuo模块：卦辞爻辞全文检索
+按单字与相邻两字（bigram）建立倒排索引，倒排表为文档号的array数组（64卦 × 卦辞+六爻 = 448条文本）
+查询时取各检索词倒排表中最短者求交得到候选文本，再在候选中计数确认，结果按命中次数排序
+用法：python main.py --search 利见大人 [-n 条数]，或 python sousuo.py 利见大人
+"""
+
+import argparse
+import array
+import sys
+import threading
+from collections import namedtuple
+
+import data  # 卦辞和爻辞存储模块
+
+# 检索结果：卦名、爻位（0为初爻，None为卦辞）、摘录、命中次数
+SearchHit = namedtuple("SearchHit", ["hexagram", "line", "snippet", "count"])
+
+LINE_LABELS = ("初爻", "二爻", "三爻", "四爻", "五爻", "上爻")
+SNIPPET_WIDTH = 12  # 摘录中命中词前后各保留的字数
+
+
+def _grams(text):
+    """文本 -> 检索键：单字文本取该字，其余取全部相邻两字"""
+    if len(text) < 2:
+        return [text] if text else []
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def make_snippet(text, term, width=SNIPPET_WIDTH):
+    """截取text中第一次出现term处前后width字，两端被截断时加省略号"""
+    pos = text.find(term)
+    if pos < 0:
+        return text[:width * 2] + ("…" if len(text) > width * 2 else "")
+    start = max(0, pos - width)
+    end = min(len(text), pos + len(term) + width)
+    return ("…" if start > 0 else "") + text[start:end] + ("…" if end < len(text) else "")
+
+
+class TextIndex:
+    """卦辞爻辞倒排索引（构建后只读，可在多线程中共享）"""
+
+    def __init__(self, texts=None):
+        texts = data.HEXAGRAM_TEXTS if texts is None else texts
+        self.documents = []  # 文档号 -> (卦名, 爻位, 文本)
+        for name, entry in texts.items():
+            self.documents.append((name, None, entry["卦辞"]))
+            for i, text in enumerate(entry["爻辞"]):
+                self.documents.append((name, i, text))
+
+        postings = {}
+        for doc_id, (_, _, text) in enumerate(self.documents):
+            for key in set(text) | set(_grams(text)):
+                postings.setdefault(key, []).append(doc_id)
+        self.postings = {key: array.array("H", ids) for key, ids in postings.items()}
+
+    def candidates(self, term):
+        """包含term全部检索键的文档号集合（可能含少量键不相邻的误中，由search计数排除）"""
+        lists = [self.postings.get(key) for key in _grams(term)]
+        if not lists or any(ids is None for ids in lists):
+            return set()
+        lists.sort(key=len)
+        result = set(lists[0])
+        for ids in lists[1:]:
+            result.intersection_update(ids)
+            if not result:
+                break
+        return result
+
+    def search(self, query, limit=20):
+        """
+        检索卦辞爻辞，多个检索词以空格分隔（须同时出现）
+        :return: SearchHit列表，按命中次数从多到少排序，次数相同时按卦序、爻序
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        doc_ids = None
+        for term in sorted(terms, key=lambda t: min((len(self.postings.get(k, ())) for k in _grams(t)), default=0)):
+            found = self.candidates(term)
+            doc_ids = found if doc_ids is None else doc_ids & found
+            if not doc_ids:
+                return []
+
+        hits = []
+        for doc_id in sorted(doc_ids):
+            name, line, text = self.documents[doc_id]
+            counts = [text.count(term) for term in terms]
+            if all(counts):
+                hits.append((-sum(counts), doc_id, SearchHit(name, line, make_snippet(text, terms[0]), sum(counts))))
+        hits.sort(key=lambda item: item[:2])
+        return [hit for _, _, hit in hits[:limit]]
+
+
+_DEFAULT_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_index():
+    """获取基于data.HEXAGRAM_TEXTS的默认索引，首次调用时构建"""
+    global _DEFAULT_INDEX
+    if _DEFAULT_INDEX is None:
+        with _INDEX_LOCK:
+            if _DEFAULT_INDEX is None:
+                _DEFAULT_INDEX = TextIndex()
+    return _DEFAULT_INDEX
+
+
+def search(query, limit=20):
+    """在默认索引中检索，参数与返回值同TextIndex.search"""
+    return get_index().search(query, limit)
+
+
+def format_hit(hit):
+    """检索结果转为一行文字，如“乾为天 二爻：九二：见龙在田，利见大人。（1处）”"""
+    position = "卦辞" if hit.line is None else LINE_LABELS[hit.line]
+    return f"{hit.hexagram} {position}：{hit.snippet}（{hit.count}处）"
+
+
+def cli_main(argv=None):
+    """检索命令行入口，返回进程退出码（无结果时为1）"""
+    parser = argparse.ArgumentParser(prog="python main.py --search", description="检索64卦卦辞与爻辞")
+    parser.add_argument("query", nargs="+", help="检索词，多个词须同时出现")
+    parser.add_argument("-n", "--limit", type=int, default=20, help="最多显示条数（默认20）")
+    args = parser.parse_args(argv)
+
+    hits = search(" ".join(args.query), args.limit)
+    for hit in hits:
+        print(format_hit(hit))
+    if not hits:
+        print("未找到匹配的卦辞或爻辞")
+    return 0 if hits else 1
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main())
@@ -0,0 +1,211 @@
+"""
+ai_main客户端测试：在本地启动模拟DeepSeek接口的HTTP服务（流式响应默认使用分块传输，与真实SSE流一致）
+路径决定响应方式：/length按Content-Length发送，/slow每块之间稍作停顿，/hang发出首块后一直等到客户端断开
+运行：python -m pytest -q
+"""
+
+import asyncio
+import http.server
+import json
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+import ai_main
+import shuchu
+
+REPLY = ["你好", "，", "世界"]
+
+
+class FakeDeepSeekHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 保持连接，以便统计连接复用
+
+    def setup(self):
+        self.server.connections += 1
+        super().setup()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.headers.get("Authorization") != "Bearer sk-test":
+            self._send_json(401, {"error": {"message": "Authentication Fails"}})
+        elif not body["stream"]:
+            self._send_json(200, {"choices": [{"message": {"content": "".join(REPLY)}}]})
+        elif self.path == "/length":
+            data = "".join(_event(text) for text in REPLY + [None]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_stream()
+
+    def _send_stream(self):
+        with self.server.lock:  # 在发出任何数据前计入、在发出最后一块前减去，统计不受线程调度影响
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for text in REPLY:
+            self._send_chunk(_event(text))
+            self.wfile.flush()
+            if self.path == "/hang":
+                self.connection.settimeout(5)
+                self.rfile.read(1)  # 客户端断开时返回b""
+                self.server.disconnected.set()
+                return
+            if self.path == "/slow":
+                time.sleep(0.01)
+        with self.server.lock:
+            self.server.active -= 1
+        self._send_chunk(_event(None))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def _send_json(self, status, obj):
+        data = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _event(text):
+    """一个SSE事件；text为None时为[DONE]"""
+    if text is None:
+        return "data: [DONE]\n\n"
+    return "data: " + json.dumps({"choices": [{"delta": {"content": text}}]}) + "\n\n"
+
+
+class FakeDeepSeekServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.connections = 0
+        self.active = 0  # 正在发送的流式响应数
+        self.peak = 0
+        self.lock = threading.Lock()
+        self.disconnected = threading.Event()
+
+
+@pytest.fixture
+def server():
+    srv = FakeDeepSeekServer(("127.0.0.1", 0), FakeDeepSeekHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def client(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+    with ai_main.DeepSeekClient("sk-test", url=url) as c:
+        yield c
+
+
+def test_stream_reuses_chunked_connection(server, client):
+    for _ in range(7):
+        chunks = list(ai_main.deepseek_chat("sk-test", "问", client=client, sink=shuchu.NULL_SINK))
+        assert chunks == REPLY + [None]
+    assert server.connections == 1
+
+
+def test_complete_returns_dict(client):
+    result = ai_main.deepseek_chat("sk-test", "问", stream=False, client=client)
+    assert result == {"content": "".join(REPLY), "stream": False}
+
+
+def test_http_error_is_reported(client):
+    chunks = list(ai_main.deepseek_chat("sk-wrong", "问", client=client, sink=shuchu.NULL_SINK))
+    assert len(chunks) == 1 and "401" in chunks[0]["error"]
+    assert "401" in ai_main.deepseek_chat("sk-wrong", "问", stream=False, client=client)["error"]
+
+
+def test_refused_connection_is_reported():
+    with socket.socket() as sock:  # 取得一个当前无人监听的端口
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    with ai_main.DeepSeekClient("sk-test", url=f"http://127.0.0.1:{port}/", connect_timeout=1) as c:
+        chunks = list(c.stream("问"))
+        assert len(chunks) == 1 and chunks[0]["error"].startswith("请求失败")
+        assert c.complete("问")["error"].startswith("请求失败")
+
+
+# ---------------------- asyncio客户端 ----------------------
+def _async_client(server, path="/chat/completions", **kwargs):
+    return ai_main.AsyncDeepSeekClient("sk-test", url=f"http://127.0.0.1:{server.server_address[1]}{path}", **kwargs)
+
+
+async def _collect(client, prompt="问", **kwargs):
+    return [chunk async for chunk in client.stream(prompt, **kwargs)]
+
+
+def test_async_stream_respects_max_concurrency(server):
+    client = _async_client(server, "/slow", max_concurrency=4)
+
+    async def run():
+        return await asyncio.gather(*(_collect(client) for _ in range(40)))
+
+    assert asyncio.run(run()) == [REPLY] * 40
+    assert server.peak == 4
+
+
+def test_async_content_length_body(server):
+    client = _async_client(server, "/length")
+    assert asyncio.run(_collect(client)) == REPLY
+    assert asyncio.run(client.chat("问")) == {"content": "".join(REPLY), "stream": False}
+
+
+@pytest.mark.parametrize("stop", ["aclose", "cancel"])
+def test_async_stop_closes_connection(server, stop):
+    client = _async_client(server, "/hang")
+
+    async def run():
+        stream = client.stream("问")
+        if stop == "aclose":
+            assert await stream.__anext__() == REPLY[0]
+            await stream.aclose()
+            return
+        first = asyncio.Event()
+
+        async def consume():
+            async for _ in stream:
+                first.set()
+
+        task = asyncio.create_task(consume())
+        await first.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert server.disconnected.wait(5)
+
+
+def test_async_errors_are_reported(server):
+    client = ai_main.AsyncDeepSeekClient("sk-wrong", url=f"http://127.0.0.1:{server.server_address[1]}/")
+    chunks = asyncio.run(_collect(client))
+    assert len(chunks) == 1 and "401" in chunks[0]["error"]
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    client = ai_main.AsyncDeepSeekClient("sk-test", url=f"http://127.0.0.1:{port}/", connect_timeout=1)
+    chunks = asyncio.run(_collect(client))
+    assert len(chunks) == 1 and chunks[0]["error"].startswith("请求失败")
+    assert asyncio.run(client.chat("问"))["error"].startswith("请求失败")
@@ -0,0 +1,75 @@
+"""
+huancun回复缓存测试：TTL过期、超出大小预算时按最近访问淘汰、只有排盘时间不同的提问命中同一条目
+运行：python -m pytest -q
+"""
+
+import datetime
+
+import pytest
+
+import huancun
+import main
+import tishi
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(huancun.time, "time", fake)
+    return fake
+
+
+def _open(tmp_path, **kwargs):
+    return huancun.ResponseCache(str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_hit_and_ttl_expiry(tmp_path, clock):
+    cache = _open(tmp_path, ttl=60)
+    cache.put("k", ["你好", "，", "世界"])
+    assert cache.get("k") == ["你好", "，", "世界"]
+    clock.now += 61
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_lru_eviction(tmp_path, clock):
+    chunk = "卦" * 100  # 每条约300字节
+    cache = _open(tmp_path, max_bytes=1000)
+    for key in ("a", "b", "c"):
+        cache.put(key, [chunk])
+        clock.now += 1
+    assert cache.get("a") == [chunk]  # a最近被访问，b成为最久未访问的条目
+    clock.now += 1
+    cache.put("d", [chunk])
+    assert cache.get("b") is None
+    assert all(cache.get(key) == [chunk] for key in ("a", "c", "d"))
+    cache.close()
+
+
+def test_prompts_differing_only_in_time_share_key():
+    hexagram = [1, 3, 2, 4, 2, 1]
+    early = main.compute_chart(hexagram, datetime.datetime(2025, 8, 20, 9, 10), "问事业")
+    late = main.compute_chart(hexagram, datetime.datetime(2025, 8, 20, 10, 50), "问事业")  # 同一时辰（巳时）
+    for render in (main.render_ai_text, tishi.render_prompt):
+        first, second = render(early), render(late)
+        assert first != second
+        assert huancun.make_key("deepseek-chat", 0.7, first) == huancun.make_key("deepseek-chat", 0.7, second)
+    other = main.compute_chart(hexagram, datetime.datetime(2025, 8, 20, 11, 10), "问事业")  # 午时，时柱不同
+    assert huancun.make_key("deepseek-chat", 0.7, tishi.render_prompt(other)) != \
+        huancun.make_key("deepseek-chat", 0.7, tishi.render_prompt(early))
+
+
+def test_open_cache_failure_returns_none(tmp_path, caplog):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    assert huancun.open_cache(str(blocker / "cache.sqlite3")) is None
+    assert "AI回复缓存不可用" in caplog.text
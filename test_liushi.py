@@ -0,0 +1,54 @@
+"""
+liushi增量SSE解析测试：同一条流按任意大小切块（含逐字节）喂入，解析结果与整段一次喂入完全一致
+运行：python -m pytest -q
+"""
+
+import json
+
+import pytest
+
+import liushi
+
+# CRLF换行、注释行、多行data、event字段、非法UTF-8与接口错误事件
+EDGE_STREAM = (
+    b": keep-alive\r\n\r\n"
+    b"data: " + json.dumps({"choices": [{"delta": {"content": "初九"}}]}, ensure_ascii=False).encode() + b"\r\n\r\n"
+    b"data: {\"choices\": [{\"delta\":\r\n"
+    b"data:  {\"content\": \"\xe6\xbd\x9c\xe9\xbe\x99\"}}]}\r\n\r\n"
+    b"event: ping\ndata: ignored\n\n"
+    b"data: {\"choices\": [{\"delta\": {\"content\": \"\xff\xfe\"}}]}\n\n"
+    b"event: error\ndata: {\"error\": {\"message\": \"rate limited\"}}\n\n"
+    b"data: {\"usage\": {\"total_tokens\": 3}}\n\n"
+    b"data: [DONE]\n\n"
+)
+
+STREAMS = {"sample": liushi.sample_stream(300), "edge": EDGE_STREAM}
+
+
+def _parse(chunks):
+    parser = liushi.ChatStreamParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return events
+
+
+@pytest.mark.parametrize("name", sorted(STREAMS))
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1500])
+def test_chunking_does_not_change_events(name, size):
+    raw = STREAMS[name]
+    whole = _parse([raw])
+    assert _parse([raw[i:i + size] for i in range(0, len(raw), size)]) == whole
+    assert _parse(liushi.split_chunks(raw, seed=size)) == whole
+
+
+def test_edge_stream_events():
+    kinds = [(event.kind, event.text) for event in _parse([EDGE_STREAM])]
+    assert kinds == [
+        (liushi.DELTA, "初九"),
+        (liushi.DELTA, "潜龙"),  # 多行data以换行连接后仍是一个JSON对象
+        (liushi.DELTA, "��"),  # 非法UTF-8按U+FFFD替换，不抛出异常
+        (liushi.ERROR, "rate limited"),
+        (liushi.USAGE, ""),
+        (liushi.DONE, ""),
+    ]
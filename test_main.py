@@ -0,0 +1,43 @@
+"""
+main.arrange并发测试：多个线程同时排盘时结果互不串扰（与单线程逐条排盘的结果逐字一致）
+运行：python -m pytest -q
+"""
+
+import datetime
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+import shuchu
+
+CALLS = 4000
+THREADS = 32
+
+
+def _random_casts(count, seed=0):
+    rnd = random.Random(seed)
+    casts = []
+    for n in range(count):
+        hexagram = [rnd.randint(1, 4) for _ in range(6)]
+        time = datetime.datetime(rnd.randint(1950, 2090), rnd.randint(1, 12), rnd.randint(1, 28),
+                                 rnd.randint(0, 23), rnd.randint(0, 59))
+        casts.append((hexagram, time, f"问事{n}"))  # 每条起卦原因不同，串扰时必然不一致
+    return casts
+
+
+def _arrange(cast):
+    """返回(完整文本, AI提问文本)；排盘出错时返回异常类型，与单线程结果一并比较"""
+    try:
+        result = main.arrange(*cast, sink=shuchu.NULL_SINK)
+    except Exception as e:
+        return type(e)
+    return result.text, result.ai_text
+
+
+def test_concurrent_arrange_matches_sequential():
+    casts = _random_casts(CALLS)
+    expected = [_arrange(cast) for cast in casts]
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        actual = list(executor.map(_arrange, casts))
+    mismatches = [i for i, (a, b) in enumerate(zip(actual, expected)) if a != b]
+    assert not mismatches, f"{len(mismatches)}/{CALLS}条结果与单线程不一致，如第{mismatches[0]}条"
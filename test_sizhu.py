@@ -0,0 +1,29 @@
+"""
+sizhu四柱测试：固定日期的年、月、日、时柱（期望值与lunar_python一致），含立春交节与23点后的子时
+运行：python -m pytest -q
+"""
+
+import datetime
+
+import pytest
+
+import sizhu
+
+
+@pytest.mark.parametrize("moment, expected", [
+    ((2025, 9, 6, 16, 34), "乙巳年 甲申月 戊寅日 庚申时"),
+    ((2025, 9, 6, 23, 30), "乙巳年 甲申月 戊寅日 甲子时"),  # 晚子时：时干按次日己卯日起，日柱不换
+    ((2025, 9, 7, 0, 30), "乙巳年 甲申月 己卯日 甲子时"),
+    ((2000, 1, 1, 23, 59), "己卯年 丙子月 戊午日 甲子时"),
+    ((1984, 2, 2, 23, 0), "癸亥年 乙丑月 丙寅日 庚子时"),
+    ((2024, 2, 4, 16, 26), "癸卯年 乙丑月 戊戌日 庚申时"),  # 立春交节（16:27）前
+    ((2024, 2, 4, 16, 30), "甲辰年 丙寅月 戊戌日 庚申时"),  # 立春交节后
+])
+def test_get_pillars(moment, expected):
+    assert sizhu.format_pillars(sizhu.get_pillars(datetime.datetime(*moment))) == expected
+
+
+def test_late_zi_keeps_day_xunkong():
+    late = sizhu.get_pillars(datetime.datetime(2025, 9, 6, 23, 30))
+    evening = sizhu.get_pillars(datetime.datetime(2025, 9, 6, 21, 0))
+    assert (late.day, late.xunkong, late.day_index) == (evening.day, evening.xunkong, evening.day_index)
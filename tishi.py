@@ -0,0 +1,117 @@
+"""
+tishi模块：向AI提问的紧凑排盘文本
+render_ai_text为人阅读排版（140字符分隔线、表头、按列补齐的空格），这些字符占用tokens却不携带信息；
+render_prompt按“键：值”与竖线分隔的紧凑表格输出同样的排盘内容，estimate_tokens给出tokens估算
+用法：python tishi.py [排盘数]  随机排盘比较两种提问文本的字符数、估算tokens与渲染耗时
+"""
+
+import random
+import re
+import sys
+import time
+
+import jichu  # 基础编码模块
+import huancun  # AI回复缓存模块（排盘时间标签）
+import sizhu  # 四柱干支模块
+import nongli  # 农历模块
+
+POSITIONS = ("初", "二", "三", "四", "五", "上")
+LINE_NAMES = {1: "少阴", 2: "少阳", 3: "纯阳", 4: "纯阴"}
+SHI_YING = {" + ": "世", " * ": "应"}
+TABLE_HEADER = "爻|六兽|六亲|地支|世应|爻象|旺衰|状态"
+
+
+def _render_rows(rows, moving_marks):
+    """六爻紧凑表格（从上爻到初爻），动爻在爻象后加“动”"""
+    lines = [TABLE_HEADER]
+    for i in range(5, -1, -1):
+        row = rows[i]
+        relative = jichu.RELATIVE_NAMES[row.relative] if row.relative is not None else ""
+        branch = jichu.BRANCH_NAMES[row.branch] + jichu.ELEMENT_NAMES[jichu.BRANCH_ELEMENT[row.branch]]
+        line = LINE_NAMES[row.line] + ("动" if moving_marks and row.line in (3, 4) else "")
+        lines.append(f"{POSITIONS[i]}|{row.beast}|{relative}|{branch}|{SHI_YING.get(row.shi_ying, '')}|{line}|"
+                     f"{row.score:g}|{'、'.join(row.status)}")
+    return lines
+
+
+def render_prompt(chart):
+    """将Chart渲染为紧凑的提问文本（内容与render_ai_text相同，去掉排版用的分隔线与空白）"""
+    time_ = chart.time
+    lines = [f"{huancun.TIME_LABEL}{time_.year}-{time_.month:02d}-{time_.day:02d} {time_.hour:02d}:{time_.minute:02d}"]
+    if chart.lunar:
+        lines.append(f"农历：{nongli.format_lunar(chart.lunar)}")
+    lines.append(f"起卦原因：{chart.reason}")
+    xunkong = "".join(jichu.BRANCH_NAMES[b] for b in chart.xunkong if b is not None)
+    lines.append(f"四柱：{sizhu.format_pillars(chart.pillars)}；旬空：{xunkong}")
+
+    info = chart.original_info
+    lines.append(f"本卦：{info.name}（{info.palace_name}{info.type}），世{POSITIONS[info.shi]}爻，应{POSITIONS[info.ying]}爻")
+    lines.extend(_render_rows(chart.original_rows, moving_marks=True))
+
+    changed_info = chart.changed_info
+    if changed_info and chart.changed_rows:
+        lines.append(f"变卦：{changed_info.name}（{changed_info.palace_name}{changed_info.type}），"
+                     f"世{POSITIONS[changed_info.shi]}爻")
+        lines.extend(_render_rows(chart.changed_rows, moving_marks=False))
+
+    if chart.moving_lines:
+        lines.append("动爻：" + "、".join(POSITIONS[n - 1] + "爻" for n in chart.moving_lines))
+    else:
+        lines.append("无动爻")
+    return "\n".join(lines)
+
+
+# ---------------------- tokens估算 ----------------------
+# 按DeepSeek文档的经验换算：1个中文字符约0.6个token，1个英文字符约0.3个token；
+# 连续重复的空白或符号（补齐用的空格、分隔线）在分词时会被合并，按每8个字符1个token计（偏保守，不夸大节省量）
+_CJK = re.compile(r"[⺀-鿿豈-﫿＀-￯　-〿]")
+_REPEATED = re.compile(r"([^\w⺀-鿿])\1+")
+
+
+def estimate_tokens(text):
+    """估算文本的tokens数（经验公式，与实际计费可能有出入，用于比较不同写法）"""
+    tokens = 0.0
+    for match in _REPEATED.finditer(text):
+        tokens += -(-len(match.group()) // 8)
+    rest = _REPEATED.sub("", text)
+    cjk = len(_CJK.findall(rest))
+    return int(round(tokens + cjk * 0.6 + (len(rest) - cjk) * 0.3))
+
+
+# ---------------------- 对比测试 ----------------------
+def _random_casts(count, seed=0):
+    rnd = random.Random(seed)
+    reasons = ["求财运", "问事业发展", "问婚姻", "问健康", "问考试", "寻物"]
+    for _ in range(count):
+        hexagram = [rnd.randint(1, 4) for _ in range(6)]
+        moment = (rnd.randint(1950, 2090), rnd.randint(1, 12), rnd.randint(1, 28), rnd.randint(0, 23), rnd.randint(0, 59))
+        yield hexagram, moment, rnd.choice(reasons)
+
+
+def benchmark(count=1000, seed=0):
+    """随机排盘count次，比较render_ai_text与render_prompt的字符数、估算tokens和渲染耗时"""
+    import datetime
+    import main  # 只在对比测试时导入，避免循环依赖
+
+    charts = [main.compute_chart(hexagram, datetime.datetime(*moment), reason)
+              for hexagram, moment, reason in _random_casts(count, seed)]
+
+    results = []
+    for label, render in (("render_ai_text（原提问文本）", main.render_ai_text), ("render_prompt（紧凑）", render_prompt)):
+        start = time.perf_counter()
+        texts = [render(chart) for chart in charts]
+        elapsed = time.perf_counter() - start
+        chars = sum(len(text) for text in texts)
+        tokens = sum(estimate_tokens(text) for text in texts)
+        results.append((label, chars, tokens, elapsed))
+
+    print(f"{len(charts)}张排盘：")
+    base_tokens = results[0][2]
+    for label, chars, tokens, elapsed in results:
+        print(f"  {label:<24} 平均{chars / len(charts):7.1f}字符  估算{tokens / len(charts):6.1f} tokens  "
+              f"（{tokens / base_tokens:6.1%}）  渲染{elapsed / len(charts) * 1e6:6.1f} us/张")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -1,115 +1,62 @@
 # p4模块：六爻爻旺衰判断核心模块
 # 功能：计算每一爻的旺衰得分及状态（月扶、日生、入墓、暗动等）
+# 旺衰结果只取决于（爻支、月支、日支、变爻支、是否动爻），首次调用时一次性建成查找表，之后每次查询只做一次下标访问
 
-# 地支五行对应表
-BRANCH_WUXING = {
-    "子": "水", "丑": "土", "寅": "木", "卯": "木",
-    "辰": "土", "巳": "火", "午": "火", "未": "土",
-    "申": "金", "酉": "金", "戌": "土", "亥": "水"
-}
+import functools
+import sys
+import threading
+import time
+from collections import namedtuple
 
-# 地支相冲关系（对宫相冲）
-CONFLICT_BRANCH = {
-    "子": "午", "午": "子",
-    "丑": "未", "未": "丑",
-    "寅": "申", "申": "寅",
-    "卯": "酉", "酉": "卯",
-    "辰": "戌", "戌": "辰",
-    "巳": "亥", "亥": "巳"
-}
+import jichu  # 基础编码模块
 
-# 地支相合关系
-COMBINE_BRANCH = {
-    "子": "丑", "丑": "子",
-    "寅": "亥", "亥": "寅",
-    "卯": "戌", "戌": "卯",
-    "辰": "酉", "酉": "辰",
-    "巳": "申", "申": "巳",
-    "午": "未", "未": "午"
-}
+np = jichu.np  # 未安装numpy时为None，数组批量接口不可用
 
-# 入墓规则（爻五行对应墓库地支）
-TOMB_BRANCH = {
-    "木": "未",  # 木入未墓
-    "火": "戌",  # 火入戌墓
-    "金": "丑",  # 金入丑墓
-    "水": "辰",  # 水入辰墓
-    "土": ["辰", "戌", "丑", "未"]  # 土入四墓库
-}
+# 地支五行对应表（与main共用jichu中的同一份数据）
+BRANCH_WUXING = jichu.BRANCH_WUXING
 
-# 五行生克关系
-GENERATE_WUXING = {  # 生者→被生者
-    "木": "火",
-    "火": "土",
-    "土": "金",
-    "金": "水",
-    "水": "木"
-}
-
-CONQUER_WUXING = {  # 克者→被克者
-    "木": "土",
-    "土": "水",
-    "水": "火",
-    "火": "金",
-    "金": "木"
-}
-
-# 长生十二宫-帝旺位（仅用于日令判断）
-IMPERIAL_WANG = {
-    "木": "卯",
-    "火": "午",
-    "金": "酉",
-    "水": "子",
-    "土": ["辰", "戌", "丑", "未"]  # 土帝旺于四墓库
-}
-
-# 长生十二宫-绝位
-EXTINCTION = {
-    "木": "申",  # 木绝于申
-    "火": "亥",  # 火绝于亥
-    "金": "寅",  # 金绝于寅
-    "水": "巳",  # 水绝于巳
-    "土": "亥"  # 土随火行，绝于亥
+# 冲、合、生、克、墓、绝、帝旺等关系统一查jichu.BRANCH_RELATION位掩码矩阵
+# 四季旺相休囚死：以月令五行对爻五行的关系位查出
+SEASON_NAMES = {
+    jichu.REL_SAME_ELEMENT: "旺",  # 同月令
+    jichu.REL_GENERATED_BY: "相",  # 月令生爻
+    jichu.REL_GENERATES: "休",  # 爻生月令
+    jichu.REL_CONQUERS: "囚",  # 爻克月令
+    jichu.REL_CONQUERED_BY: "死"  # 月令克爻
 }
+_REL_WEAK_SEASON = jichu.REL_GENERATES | jichu.REL_CONQUERS | jichu.REL_CONQUERED_BY  # 休、囚、死
+_REL_COMBINE_CONQUER = jichu.REL_CONQUERED_BY | jichu.REL_CONQUERS  # 合而相克
 
 
 def get_seasonal_status(month_branch):
     """根据月令地支判断五行四季状态（旺相休囚死）"""
-    if month_branch in ["寅", "卯"]:  # 春季
-        return {"木": "旺", "火": "相", "水": "休", "金": "囚", "土": "死"}
-    elif month_branch in ["巳", "午"]:  # 夏季
-        return {"火": "旺", "土": "相", "木": "休", "水": "囚", "金": "死"}
-    elif month_branch in ["申", "酉"]:  # 秋季
-        return {"金": "旺", "水": "相", "土": "休", "火": "囚", "木": "死"}
-    elif month_branch in ["亥", "子"]:  # 冬季
-        return {"水": "旺", "木": "相", "金": "休", "土": "囚", "火": "死"}
-    elif month_branch in ["辰", "未", "戌", "丑"]:  # 四季末（土旺）
-        return {"土": "旺", "金": "相", "火": "休", "木": "囚", "水": "死"}
-    return {}  # 异常月份默认空
+    month = jichu.BRANCH_INDEX.get(month_branch)
+    if month is None:
+        return {}  # 异常月份默认空
+    month_element = jichu.BRANCH_ELEMENT[month]
+    return {jichu.ELEMENT_NAMES[e]: SEASON_NAMES[jichu.ELEMENT_RELATION[e][month_element]] for e in range(5)}
 
 
-def calculate_yao_strength(yao_branch, month_branch, day_branch, changed_yao_branch=None, is_moving_yao=False):
-    """计算单爻旺衰得分及状态"""
+def _derive_yao_strength(yao_branch, month_branch, day_branch, changed_yao_branch=None, is_moving_yao=False):
+    """按规则逐条推导单爻旺衰，返回(得分, 状态术语元组)（地支为jichu编码，仅用于构建查找表）"""
     score = 0.0
     status = []  # 存储状态术语（如月扶、日生、入墓等）
-    yao_wuxing = BRANCH_WUXING[yao_branch]
-    month_wuxing = BRANCH_WUXING[month_branch]
-    day_wuxing = BRANCH_WUXING[day_branch]
+    relation = jichu.BRANCH_RELATION[yao_branch]
+    to_month = relation[month_branch]  # 月建对爻的关系位
+    to_day = relation[day_branch]  # 日辰对爻的关系位
 
     # ---------------------- 基础得分计算 ----------------------
     # 1. 月建/日建（地支相同）
-    if yao_branch == month_branch:
+    if to_month & jichu.REL_SAME_BRANCH:
         score += 2.0
         status.append("月建")
-    if yao_branch == day_branch:
+    if to_day & jichu.REL_SAME_BRANCH:
         score += 1.5
         status.append("日建")
 
     # 2. 月合相关（合旺/合克）
-    if COMBINE_BRANCH.get(yao_branch) == month_branch:
-        month_克_yao = CONQUER_WUXING.get(month_wuxing) == yao_wuxing
-        yao_克_month = CONQUER_WUXING.get(yao_wuxing) == month_wuxing
-        if not (month_克_yao or yao_克_month):
+    if to_month & jichu.REL_COMBINE:
+        if not to_month & _REL_COMBINE_CONQUER:
             score += 1.5
             status.append("合旺")
         else:
@@ -117,10 +64,8 @@ def calculate_yao_strength(yao_branch, month_branch, day_branch, changed_yao_bra
             status.append("月合克")
 
     # 3. 日合相关（合绊/合克）
-    if COMBINE_BRANCH.get(yao_branch) == day_branch:
-        day_克_yao = CONQUER_WUXING.get(day_wuxing) == yao_wuxing
-        yao_克_day = CONQUER_WUXING.get(yao_wuxing) == day_wuxing
-        if not (day_克_yao or yao_克_day):
+    if to_day & jichu.REL_COMBINE:
+        if not to_day & _REL_COMBINE_CONQUER:
             score += 1.5
             status.append("合绊")
         else:
@@ -128,64 +73,57 @@ def calculate_yao_strength(yao_branch, month_branch, day_branch, changed_yao_bra
             status.append("日合克")
 
     # 4. 月生/日生（月令/日令生爻）
-    if GENERATE_WUXING.get(month_wuxing) == yao_wuxing:
+    if to_month & jichu.REL_GENERATED_BY:
         score += 1.5
         status.append("月生")
-    if GENERATE_WUXING.get(day_wuxing) == yao_wuxing:
+    if to_day & jichu.REL_GENERATED_BY:
         score += 1.5
         status.append("日生")
 
     # 5. 月扶/日扶（五行相同但地支不同）
-    if month_wuxing == yao_wuxing and yao_branch != month_branch:
+    if to_month & jichu.REL_SAME_ELEMENT and not to_month & jichu.REL_SAME_BRANCH:
         score += 1.0
         status.append("月扶")
-    if day_wuxing == yao_wuxing and yao_branch != day_branch:
+    if to_day & jichu.REL_SAME_ELEMENT and not to_day & jichu.REL_SAME_BRANCH:
         score += 0.5
         status.append("日扶")
 
     # 6. 月破（与月相冲）
-    if CONFLICT_BRANCH.get(yao_branch) == month_branch:
+    if to_month & jichu.REL_CLASH:
         score -= 2.0
         status.append("月破")
 
     # 7. 月克/日克（五行相克）
-    if CONQUER_WUXING.get(month_wuxing) == yao_wuxing:
+    if to_month & jichu.REL_CONQUERED_BY:
         score -= 1.0
         status.append("月克")
-    if CONQUER_WUXING.get(day_wuxing) == yao_wuxing:
+    if to_day & jichu.REL_CONQUERED_BY:
         score -= 1.0
         status.append("日克")
 
     # 8. 日散（与日相冲且不旺）
-    is_day_conflict = CONFLICT_BRANCH.get(yao_branch) == day_branch
+    is_day_conflict = to_day & jichu.REL_CLASH
     if is_day_conflict and score < 0:
         score -= 1.5
         status.append("日散")
 
     # ---------------------- 新增核心功能 ----------------------
     # 1. 帝旺（日令为爻的帝旺位）
-    diwang_branches = IMPERIAL_WANG[yao_wuxing]
-    if not isinstance(diwang_branches, list):
-        diwang_branches = [diwang_branches]
-    if day_branch in diwang_branches:
+    if to_day & jichu.REL_PEAK:
         score += 1.0
         status.append("帝旺")
 
-    # 2. 季节休囚（根据四季判断休/囚/死）
-    seasonal_status = get_seasonal_status(month_branch)
-    yao_season = seasonal_status.get(yao_wuxing)
-    if yao_season in ["休", "囚", "死"]:
+    # 2. 季节休囚（根据月令五行与爻五行的生克判断休/囚/死）
+    season = to_month & _REL_WEAK_SEASON
+    if season:
         score -= 1.5
-        status.append(f"休囚（{yao_season}）")
+        status.append(f"休囚（{SEASON_NAMES[season]}）")
 
     # 3. 入墓（月墓/日墓）
-    tomb_branches = TOMB_BRANCH[yao_wuxing]
-    if not isinstance(tomb_branches, list):
-        tomb_branches = [tomb_branches]
     tomb_source = []
-    if month_branch in tomb_branches:
+    if to_month & jichu.REL_TOMB:
         tomb_source.append("月墓")
-    if day_branch in tomb_branches:
+    if to_day & jichu.REL_TOMB:
         tomb_source.append("日墓")
     if tomb_source:
         score = -0.1  # 入墓固定得分
@@ -193,13 +131,13 @@ def calculate_yao_strength(yao_branch, month_branch, day_branch, changed_yao_bra
 
     # 4. 绝地（静爻处于日令绝位）
     if not is_moving_yao:
-        if day_branch == EXTINCTION[yao_wuxing]:
+        if to_day & jichu.REL_EXTINCTION:
             score -= 0.5
             status.append("绝地")
 
     # 5. 化绝（动爻化出绝位变爻）
-    if changed_yao_branch and is_moving_yao:
-        if changed_yao_branch == EXTINCTION[yao_wuxing]:
+    if changed_yao_branch is not None and is_moving_yao:
+        if relation[changed_yao_branch] & jichu.REL_EXTINCTION:
             score -= 1.0
             status.append("化绝")
 
@@ -209,7 +147,181 @@ def calculate_yao_strength(yao_branch, month_branch, day_branch, changed_yao_bra
 
     # 保留两位小数
     score = round(score, 2)
-    return {"score": score, "status": status}
+    return score, tuple(status)
+
+
+# 状态位掩码（位序即状态输出顺序）
+# 前23位由单爻旺衰规则得出（查找表、numpy批量接口只用到这些位），其后为排盘时按整卦补充的入墓、回头生克
+STATUS_NAMES = (
+    "月建", "日建", "合旺", "月合克", "合绊", "日合克", "月生", "日生", "月扶", "日扶",
+    "月破", "月克", "日克", "日散", "帝旺", "休囚（休）", "休囚（囚）", "休囚（死）",
+    "月墓", "日墓", "绝地", "化绝", "暗动",
+    "入初爻墓", "入二爻墓", "入三爻墓", "入四爻墓", "入五爻墓", "入上爻墓",
+    "入变爻墓", "入本位动爻墓", "回头生", "回头克"
+)
+STATUS_BITS = {name: 1 << idx for idx, name in enumerate(STATUS_NAMES)}
+_TOMB_MASK = STATUS_BITS["月墓"] | STATUS_BITS["日墓"]
+TOMB_LINE_BITS = tuple(STATUS_BITS[f"入{position}墓"] for position in ("初爻", "二爻", "三爻", "四爻", "五爻", "上爻"))
+
+
+def status_to_mask(status):
+    """将状态术语列表转换为位掩码（入墓状态拆分为月墓/日墓两位）"""
+    mask = 0
+    for name in status:
+        if name.startswith("入") and name[1:3] in ("月墓", "日墓"):
+            for source in name[1:].split("/"):
+                mask |= STATUS_BITS[source]
+        else:
+            mask |= STATUS_BITS[name]
+    return mask
+
+
+def status_mask(*names):
+    """状态术语 -> 位掩码，用于批量筛选：flags & status_mask("月破", "暗动") 非零即含其中任一状态"""
+    return status_to_mask(names)
+
+
+def mask_to_status(mask):
+    """将位掩码还原为状态术语列表（与逐条推导的输出顺序一致）"""
+    status = []
+    for idx, name in enumerate(STATUS_NAMES):
+        bit = 1 << idx
+        if not mask & bit:
+            continue
+        if bit & _TOMB_MASK:
+            if bit == STATUS_BITS["月墓"]:
+                status.append(f"入{'/'.join(n for n in ('月墓', '日墓') if mask & STATUS_BITS[n])}")
+            elif not mask & STATUS_BITS["月墓"]:
+                status.append("入日墓")
+            continue
+        status.append(name)
+    return status
+
+
+@functools.lru_cache(maxsize=None)
+def status_names(mask):
+    """位掩码 -> 状态术语元组（按掩码缓存，渲染时才生成文字）"""
+    return tuple(mask_to_status(mask))
+
+
+class YaoStrength(namedtuple("YaoStrength", ["score", "flags"])):
+    """单爻旺衰结果（不可变，查找表中共享）：flags为状态位掩码，status在读取时才转为文字"""
+    __slots__ = ()
+
+    @property
+    def status(self):
+        return status_names(self.flags)
+
+
+# ---------------------- 旺衰查找表 ----------------------
+# 下标 = (((爻支 * 12 + 月支) * 12 + 日支) * 13 + 变爻支) * 2 + 是否动爻，变爻支为12表示无变爻
+_NO_CHANGE = 12
+_STRENGTH_TABLE = None
+_TABLE_LOCK = threading.Lock()  # 多线程首次调用时只构建一次
+
+
+def _build_strength_table():
+    """构建全部 12×12×12×13×2 种组合的旺衰查找表（相同结果共享同一对象）"""
+    interned = {}
+    table = []
+    changed_options = tuple(range(12)) + (None,)
+    for yao_branch in range(12):
+        for month_branch in range(12):
+            for day_branch in range(12):
+                for changed_branch in changed_options:
+                    for is_moving in (False, True):
+                        score, status = _derive_yao_strength(yao_branch, month_branch, day_branch,
+                                                             changed_branch, is_moving)
+                        result = YaoStrength(score, status_to_mask(status))
+                        table.append(interned.setdefault(result, result))
+    return tuple(table)
+
+
+def get_strength_table():
+    """获取旺衰查找表（首次调用时构建）"""
+    global _STRENGTH_TABLE
+    if _STRENGTH_TABLE is None:
+        with _TABLE_LOCK:
+            if _STRENGTH_TABLE is None:
+                _STRENGTH_TABLE = _build_strength_table()
+    return _STRENGTH_TABLE
+
+
+def lookup_yao_strength(yao_branch, month_branch, day_branch, changed_yao_branch=None, is_moving_yao=False):
+    """查表获取单爻旺衰（地支为jichu整数编码，变爻为None表示无变爻），返回不可变的YaoStrength(score, flags)"""
+    table = _STRENGTH_TABLE or get_strength_table()
+    changed_idx = _NO_CHANGE if changed_yao_branch is None else changed_yao_branch
+    index = (((yao_branch * 12 + month_branch) * 12 + day_branch) * 13 + changed_idx) * 2 + (1 if is_moving_yao else 0)
+    return table[index]
+
+
+def batch_yao_strength(yao_branches, month_branch, day_branch, changed_branches=None, is_moving_yaos=None):
+    """
+    批量查表计算六爻旺衰（整数编码），返回查找表中共享的YaoStrength元组（不可变，不复制）；
+    入墓、回头生克等与日期无关的状态位由调用方另行按位或并入
+    """
+    table = _STRENGTH_TABLE or get_strength_table()
+    base = (month_branch * 12 + day_branch) * 13
+    results = []
+    for i in range(6):
+        changed_idx = changed_branches[i] if changed_branches else _NO_CHANGE
+        is_moving = 1 if is_moving_yaos and is_moving_yaos[i] else 0
+        results.append(table[((yao_branches[i] * 144 * 13 + base + changed_idx) * 2) + is_moving])
+    return tuple(results)
+
+
+_STRENGTH_ARRAYS = None
+
+
+def get_strength_arrays():
+    """获取numpy形式的旺衰查找表（得分数组, 状态位掩码数组），首次调用时构建"""
+    global _STRENGTH_ARRAYS
+    jichu.require_numpy()
+    if _STRENGTH_ARRAYS is None:
+        table = get_strength_table()
+        with _TABLE_LOCK:
+            if _STRENGTH_ARRAYS is None:
+                scores = np.fromiter((item.score for item in table), dtype=np.float64, count=len(table))
+                masks = np.fromiter((item.flags for item in table), dtype=np.uint32, count=len(table))
+                _STRENGTH_ARRAYS = (scores, masks)
+    return _STRENGTH_ARRAYS
+
+
+def batch_calculate_strength_array(yao_branches, month_branches, day_branches, changed_branches=None,
+                                   is_moving_yaos=None):
+    """
+    数组批量计算旺衰（地支以0-11整数编码，子=0）
+    :param yao_branches: (N, 6) 爻支
+    :param month_branches: (N,) 月支
+    :param day_branches: (N,) 日支
+    :param changed_branches: (N, 6) 变爻支，负数表示无变爻；省略时视为全部无变爻
+    :param is_moving_yaos: (N, 6) 是否动爻；省略时视为全部静爻
+    :return: ((N, 6) 得分数组, (N, 6) 状态位掩码数组)，位含义见STATUS_NAMES
+    """
+    scores, masks = get_strength_arrays()
+    yao = np.asarray(yao_branches, dtype=np.intp)
+    month = np.asarray(month_branches, dtype=np.intp)[:, None]
+    day = np.asarray(day_branches, dtype=np.intp)[:, None]
+    if changed_branches is None:
+        changed = np.full(yao.shape, _NO_CHANGE, dtype=np.intp)
+    else:
+        changed = np.asarray(changed_branches, dtype=np.intp)
+        changed = np.where(changed < 0, _NO_CHANGE, changed)
+    if is_moving_yaos is None:
+        moving = np.zeros(yao.shape, dtype=np.intp)
+    else:
+        moving = np.asarray(is_moving_yaos, dtype=bool).astype(np.intp)
+
+    index = (((yao * 12 + month) * 12 + day) * 13 + changed) * 2 + moving
+    return scores[index], masks[index]
+
+
+def calculate_yao_strength(yao_branch, month_branch, day_branch, changed_yao_branch=None, is_moving_yao=False):
+    """计算单爻旺衰得分及状态（返回可追加状态的字典，供排盘后续补充入墓、回头生克等）"""
+    index = jichu.BRANCH_INDEX
+    changed_idx = index[changed_yao_branch] if changed_yao_branch else None
+    result = lookup_yao_strength(index[yao_branch], index[month_branch], index[day_branch], changed_idx, is_moving_yao)
+    return {"score": result.score, "status": list(result.status)}
 
 
 def batch_calculate_strength(yao_branches, month_branch, day_branch, changed_branches=None, is_moving_yaos=None):
@@ -229,4 +341,105 @@ def batch_calculate_strength(yao_branches, month_branch, day_branch, changed_bra
             is_moving_yao=is_moving
         )
         results.append(result)
-    return results
\ No newline at end of file
+    return results
+
+# ---------------------- 性能测试 ----------------------
+def _check_tomb_by_rules(original_hexagram, original_branch, changed_branch, strengths, is_original=True):
+    """旧做法：流程同main.check_additional_tomb，但按jichu.ELEMENT_TOMB成员判断入墓，用作对照"""
+    moving_indices = [i for i, line in enumerate(original_hexagram) if line in [3, 4]]
+
+    for i in range(6):
+        yao_branch = original_branch[i] if is_original else changed_branch[i]
+        tomb_branches = jichu.ELEMENT_TOMB[jichu.BRANCH_ELEMENT[yao_branch]]
+
+        if is_original and original_hexagram[i] not in [3, 4]:  # 静爻
+            for idx in moving_indices:
+                if original_branch[idx] in tomb_branches:
+                    strengths[i]["flags"] |= TOMB_LINE_BITS[idx]
+
+        if is_original and original_hexagram[i] in [3, 4]:  # 动爻
+            if changed_branch and i < len(changed_branch):
+                if changed_branch[i] in tomb_branches:
+                    strengths[i]["flags"] |= STATUS_BITS["入变爻墓"]
+
+        if not is_original and i in moving_indices:  # 变卦中对应本卦动爻的位置
+            if original_branch[i] in tomb_branches:
+                strengths[i]["flags"] |= STATUS_BITS["入本位动爻墓"]
+    return strengths
+
+
+def _check_huitou_by_rules(original_branch, changed_branch, moving_indices, changed_strength):
+    """旧做法：流程同main.check_huitou，但按generates/conquers比较五行，用作对照"""
+    for i in moving_indices:
+        original_wuxing = jichu.BRANCH_ELEMENT[original_branch[i]]
+        changed_wuxing = jichu.BRANCH_ELEMENT[changed_branch[i]]
+        if jichu.generates(changed_wuxing) == original_wuxing:
+            changed_strength[i]["flags"] |= STATUS_BITS["回头生"]
+        if jichu.conquers(changed_wuxing) == original_wuxing:
+            changed_strength[i]["flags"] |= STATUS_BITS["回头克"]
+    return changed_strength
+
+
+def _cast_flags_with(main, check_tomb, check_huitou, original_index, moving_mask):
+    """按main._cast_flags的流程（不经lru_cache），用指定的入墓、回头生克判断函数计算一种起卦的状态位"""
+    original_hexagram = [(3 if moving_mask >> i & 1 else 2) if original_index >> i & 1 else
+                         (4 if moving_mask >> i & 1 else 1) for i in range(6)]
+    original_branch = main.HEXAGRAM_CHARTS[original_index].branches
+    changed_branch = main.HEXAGRAM_CHARTS[original_index ^ moving_mask].branches if moving_mask else None
+
+    original_flags = check_tomb(original_hexagram, original_branch, changed_branch,
+                                [{"flags": 0} for _ in range(6)], is_original=True)
+    if not moving_mask:
+        return tuple(item["flags"] for item in original_flags), None
+
+    changed_flags = check_tomb(original_hexagram, original_branch, changed_branch,
+                               [{"flags": 0} for _ in range(6)], is_original=False)
+    changed_flags = check_huitou(original_branch, changed_branch, main.MOVING_INDICES[moving_mask], changed_flags)
+    return tuple(item["flags"] for item in original_flags), tuple(item["flags"] for item in changed_flags)
+
+
+def _best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(count=3000, repeat=7, seed=0):
+    """
+    关系位矩阵的耗时（取repeat次中最快的一次）：构建旺衰查找表、
+    全部64×64种起卦的入墓/回头生克判断（与按五行规则逐条比较的旧做法对照）、随机排盘count次的单张排盘
+    """
+    import datetime
+    import random
+    import main  # 只在性能测试时导入，避免循环依赖
+
+    elapsed, table = _best_time(_build_strength_table, repeat)
+    same = "一致" if table == get_strength_table() else "不一致"
+    print(f"旺衰查找表：{len(table)}种组合  构建{elapsed:6.3f} s  与当前查找表{same}")
+
+    casts = [(index, mask) for index in range(64) for mask in range(64)]
+    expected = None
+    print(f"入墓/回头生克：{len(casts)}种起卦（不经lru_cache，每次都重新判断）")
+    for label, check_tomb, check_huitou in (("五行规则逐条比较（旧）", _check_tomb_by_rules, _check_huitou_by_rules),
+                                            ("关系位矩阵", main.check_additional_tomb, main.check_huitou)):
+        elapsed, flags = _best_time(lambda: [_cast_flags_with(main, check_tomb, check_huitou, index, mask)
+                                             for index, mask in casts], repeat)
+        expected = expected if expected is not None else flags
+        same = "一致" if flags == expected else "不一致"
+        print(f"  {label:<16} {elapsed / len(casts) * 1e6:6.2f} us/卦  状态位与旧做法{same}")
+
+    rnd = random.Random(seed)
+    charts = [([rnd.randint(1, 4) for _ in range(6)],
+               datetime.datetime(rnd.randint(1950, 2090), rnd.randint(1, 12), rnd.randint(1, 28),
+                                 rnd.randint(0, 23), rnd.randint(0, 59)))
+              for _ in range(count)]
+    elapsed, _ = _best_time(lambda: [main.compute_chart(hexagram, moment, "求财运") for hexagram, moment in charts],
+                            repeat)
+    print(f"compute_chart：{count}张排盘  {elapsed / count * 1e6:6.2f} us/张")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)